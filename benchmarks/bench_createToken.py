@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+# Measures the cost of constructing one UsfmToken from a token group, over a whole synthetic New Testament.
+# Compares parseUsfm.createToken() with the linear scan of the options table that it replaced.
+# Usage: python benchmarks/bench_createToken.py [repeat]
+
+import sys
+import time
+import corpus
+import parseUsfm
+
+# The former createToken(), which compared the marker with every key in the options table in turn.
+def linearCreateToken(t):
+    for k, uclass in parseUsfm.options.items():
+        if t[0] == k:
+            if len(t) == 1:
+                token = uclass()
+            else:
+                token = uclass(t[1])
+            token.type = k
+            return token
+    raise Exception(t[0])
+
+# Returns the best time, in seconds, to construct all the tokens.
+def timeConstruction(create, groups, repeat):
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        for t in groups:
+            create(t)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    groups = list(parseUsfm.scanString(parseUsfm.clean(corpus.wholeText())))
+    print(f"{len(groups)} tokens, best of {repeat} runs")
+    before = timeConstruction(linearCreateToken, groups, repeat)
+    after = timeConstruction(parseUsfm.createToken, groups, repeat)
+    for label, elapsed in (("linear scan", before), ("table lookup", after)):
+        print(f"{label:14s} {elapsed:7.3f}s  {elapsed / len(groups) * 1e9:7.0f} ns/token")
+    print(f"speedup {before / after:.1f}x")
+
+if __name__ == "__main__":
+    main()
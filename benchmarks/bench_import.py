@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+# Measures the time to import the parser and some of the modules that use it.
+# Each import runs in a fresh interpreter with -X importtime. The best of several runs is reported,
+# after one run to bring the __pycache__ files up to date.
+# usfm_grammar is the pyparsing grammar, which parseUsfm imports only when the pyparsing engine is used.
+# Usage: python benchmarks/bench_import.py [repeat]
+
+import os
+import subprocess
+import sys
+
+benchmarks_path = os.path.dirname(os.path.realpath(__file__))
+src_path = os.path.join(os.path.dirname(benchmarks_path), "src")
+
+modules = ['parseUsfm', 'usfm_grammar', 'verifyUSFM', 'usfm2usx', 'usfm_cleanup']
+
+# Returns the cumulative import time of module in microseconds, as reported by -X importtime.
+def importTime(module):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=src_path, capture_output=True, text=True)
+    for line in result.stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1])
+    raise RuntimeError(result.stderr[-500:])
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for module in modules:
+        importTime(module)
+        best = min(importTime(module) for i in range(repeat))
+        print(f"{module:14s} {best / 1000:7.1f} ms")
+
+if __name__ == "__main__":
+    main()
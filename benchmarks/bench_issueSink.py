@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+# Times reporting the issues found in an error-heavy book, with each issue written as it is reported,
+# as verifyUSFM used to, and with the issues passed on in batches by an IssueSink, as main() does now.
+# The book is the synthetic Psalms with the space after commas and semicolons removed, which makes thousands of issues.
+# The book is verified once, recording the report calls, and the timing replays the calls, as verifyFiles() does,
+# so it measures the reporting and not the checks.
+# stderr goes to a line buffered file, as it does when it is redirected, and a stand-in for the GUI counts
+# the events that would be sent to the Tk event loop, each of which makes the GUI add text to its window.
+# Usage: python benchmarks/bench_issueSink.py
+
+import contextlib
+import io
+import os
+import tempfile
+import threading
+import time
+import corpus
+import verifyUSFM
+
+class FakeGui:
+    def __init__(self):
+        self.progress_lock = threading.Lock()
+        self.progress = ""
+        self.events = 0
+    def event_generate(self, event, when=None):
+        self.events += 1
+        self.progress = ""
+
+def record(text):
+    verifyUSFM.config = {'source_dir': "", 'compare_dir': ""}
+    verifyUSFM.state = verifyUSFM.State()
+    verifyUSFM.issues = dict()
+    verifyUSFM.recorder = []
+    verifyUSFM.verifyContents(text, "19-PSA.usfm")
+    calls = verifyUSFM.recorder
+    verifyUSFM.recorder = None
+    return calls
+
+def replay(folder, calls, sink):
+    verifyUSFM.config = {'source_dir': folder, 'compare_dir': ""}
+    verifyUSFM.issues = dict()
+    verifyUSFM.gui = FakeGui()
+    verifyUSFM.sink = sink
+    with io.open(os.path.join(folder, "stderr.txt"), "w", buffering=1, encoding="utf-8") as stderr, \
+         contextlib.redirect_stderr(stderr), contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for call in calls:
+            getattr(verifyUSFM, call[0])(*call[1:])
+        if sink:
+            sink.close()
+        verifyUSFM.issuesFile.close()
+        elapsed = time.perf_counter() - start
+    verifyUSFM.issuesFile = None
+    verifyUSFM.sink = None
+    with io.open(os.path.join(folder, "issues.txt"), encoding="utf-8") as input:
+        issues = input.read().split('\n', 1)[1]
+    return elapsed, verifyUSFM.gui.events, issues
+
+def main():
+    calls = record(corpus.book('PSA').replace(', ', ',').replace('; ', ';'))
+    print(f"{sum(call[0] == 'reportError' for call in calls)} issues")
+    with tempfile.TemporaryDirectory() as folder:
+        results = [("each issue", *min(replay(folder, calls, None) for i in range(5))),
+                   ("IssueSink", *min(replay(folder, calls, verifyUSFM.IssueSink()) for i in range(5)))]
+    for label, elapsed, events, issues in results:
+        print(f"{label:10s} {elapsed:7.3f}s  {results[0][1] / elapsed:4.1f}x  {events:6d} GUI events")
+    print("same issues.txt" if results[0][3] == results[1][3] else "DIFFERENT issues.txt")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+# Measures parseUsfm.parseParallel() against the number of worker processes.
+# Parses a synthetic 66 book Bible in a single string with the fast tokenizer,
+# and the Psalms with the pyparsing grammar, which is much slower.
+# Usage: python benchmarks/bench_parallelParse.py [maxworkers]
+
+import os
+import sys
+import time
+import corpus
+import parseUsfm
+
+def timeParse(text, workers, engine):
+    start = time.perf_counter()
+    parseUsfm.parseParallel(text, workers, engine)
+    return time.perf_counter() - start
+
+def main():
+    maxworkers = int(sys.argv[1]) if len(sys.argv) > 1 else (os.cpu_count() or 1)
+    counts = [1]
+    while counts[-1] * 2 <= maxworkers:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != maxworkers:
+        counts.append(maxworkers)
+    print(f"{os.cpu_count()} CPUs")
+    for label, text, engine in (("Bible, fast", corpus.wholeText(corpus.biblebooks), 'fast'),
+                                ("Psalms, pyparsing", corpus.book('PSA'), 'pyparsing')):
+        base = None
+        for workers in counts:
+            elapsed = timeParse(text, workers, engine)
+            base = base or elapsed
+            print(f"{label:18s} {workers:3d} workers {elapsed:7.2f}s  speedup {base / elapsed:4.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# Compares usfmPrinter with usfmWriter for writing the tokens of a synthetic 66 book Bible back to usfm.
+# usfmWriter writes each token to a file as it goes. The printer output is written to a file in one call.
+# Also checks whether the output of each parses to the same tokens again.
+# Usage: python benchmarks/bench_printer.py
+
+import os
+import tempfile
+import time
+import corpus
+import parseUsfm
+import usfmPrinter
+import usfmWriter
+
+def best(f, repeat=5):
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        f()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def writeWithWriter(tokens, path):
+    writer = usfmWriter.usfmWriter(path)
+    for token in tokens:
+        if token.isTEXT():
+            writer.writeStr(token.value)
+        else:
+            writer.writeUsfm(token.type, token.value)
+    writer.close()
+
+def writeWithPrinter(tokens, path):
+    with open(path, "w", encoding='utf-8', newline='') as output:
+        output.write(usfmPrinter.printTokens(tokens))
+
+# Returns whether the file at path parses to the same tokens.
+def roundTrip(tokens, path):
+    with open(path, encoding='utf-8', newline='') as input:
+        again = parseUsfm.parseString(input.read())
+    return [(t.type, t.value) for t in again] == [(t.type, t.value) for t in tokens]
+
+def main():
+    tokens = parseUsfm.parseString(corpus.wholeText(corpus.biblebooks))
+    print(f"{len(tokens)} tokens")
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "out.usfm")
+        results = []
+        for label, write in (("usfmWriter", writeWithWriter), ("usfmPrinter", writeWithPrinter)):
+            elapsed = best(lambda: write(tokens, path))
+            results.append((label, elapsed, roundTrip(tokens, path)))
+    for label, elapsed, same in results:
+        print(f"{label:11s} {elapsed:7.3f}s  {results[0][1] / elapsed:4.1f}x  round trip {'identical' if same else 'different'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# Times scoring the similarity of every verse of a synthetic 66 book Bible to its source text.
+# The translation is the source with about half of the verses partly changed.
+# Compares:
+#   per verse  - splitting the source and target verse into sets for each verse, as similarToSource() used to
+#   indexed    - verifyUSFM.similarities(), with the source words already in sets
+#   numpy      - hashing the words of all verses into (verse, word) keys and counting the keys in common per verse
+#                with sorted NumPy arrays, if NumPy is installed. The source keys are made once, outside the timing.
+# Also checks that all of them give the same scores.
+# Usage: python benchmarks/bench_similarity.py
+
+import itertools
+import random
+import time
+import corpus
+import verifyUSFM
+
+def best(f, repeat=5):
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        result = f()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+# Changes about half of the words in about half of the verses.
+def translate(text, rnd):
+    lines = []
+    for line in text.split('\n'):
+        if line.startswith('\\v ') and rnd.random() < 0.5:
+            words = line.split(' ')
+            line = ' '.join(words[:2] + [w if rnd.random() < 0.5 else w[::-1] for w in words[2:]])
+        lines.append(line)
+    return '\n'.join(lines)
+
+def perVerse(source, verses):
+    scores = {}
+    for reference in verses:
+        if reference in source:
+            A = set(source[reference].split())
+            B = set(verses[reference].split())
+            wordsincommon = [w for w in A&B if len(w) > 2 and w.islower()]
+            scores[reference] = (len(wordsincommon) / len(A|B), len(wordsincommon))
+    return scores
+
+# Returns the sorted, distinct keys of the words in each list: the list number in the top bits, the word's hash below.
+def wordKeys(numpy, wordlists):
+    lengths = numpy.fromiter(map(len, wordlists), numpy.int64, len(wordlists))
+    hashes = numpy.fromiter(map(hash, itertools.chain.from_iterable(wordlists)), numpy.int64, int(lengths.sum()))
+    keys = numpy.repeat(numpy.arange(len(wordlists), dtype=numpy.int64), lengths) << 47 | (hashes & ((1 << 47) - 1))
+    keys.sort()
+    return keys[numpy.concatenate(([True], keys[1:] != keys[:-1]))]
+
+def countPerVerse(numpy, keys, n):
+    return numpy.bincount(keys >> 47, minlength=n)
+
+def vectorized(numpy, references, sourcekeys, commonkeys, verses):
+    n = len(references)
+    targetkeys = wordKeys(numpy, [verses[reference].split() for reference in references])
+    inter = countPerVerse(numpy, targetkeys[numpy.isin(targetkeys, sourcekeys, assume_unique=True)], n)
+    common = countPerVerse(numpy, targetkeys[numpy.isin(targetkeys, commonkeys, assume_unique=True)], n)
+    union = countPerVerse(numpy, sourcekeys, n) + countPerVerse(numpy, targetkeys, n) - inter
+    return {reference: (c / u, c) for reference, c, u in zip(references, common.tolist(), union.tolist())}
+
+def main():
+    rnd = random.Random(1)
+    source = {}
+    index = {}
+    verses = {}
+    for id in corpus.biblebooks:
+        text = corpus.book(id)
+        source.update(verifyUSFM.scanVerses(text))
+        index.update(verifyUSFM.indexSource(text))
+        verses.update(verifyUSFM.scanVerses(translate(text, rnd)))
+    references = [reference for reference in verses if reference in index]
+    print(f"{len(references)} verses")
+    results = [("per verse", *best(lambda: perVerse(source, verses))),
+               ("indexed", *best(lambda: verifyUSFM.similarities(index, verses)))]
+    try:
+        import numpy
+        sourcekeys = wordKeys(numpy, [index[reference][0] for reference in references])
+        commonkeys = wordKeys(numpy, [index[reference][1] for reference in references])
+        results.append(("numpy", *best(lambda: vectorized(numpy, references, sourcekeys, commonkeys, verses))))
+    except ImportError:
+        print("NumPy is not installed")
+    for label, elapsed, scores in results:
+        same = all(abs(scores[r][0] - results[0][2][r][0]) < 1e-12 and scores[r][1] == results[0][2][r][1]
+                   for r in references)
+        print(f"{label:10s} {elapsed:7.3f}s  {results[0][1] / elapsed:4.1f}x  {'same scores' if same else 'DIFFERENT SCORES'}")
+
+if __name__ == "__main__":
+    main()
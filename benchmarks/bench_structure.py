@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# Times the checks that verifyUSFM makes over the whole text of each book before parsing it, over a synthetic 66 book Bible.
+# Compares verifyUSFM.scanStructure(), which finds all of them in one pass, with a pass of each pattern over the text
+# and a count of each kind of straight quote, as verifyWholeFile() and verifyContents() used to make.
+# The books are timed as they are, with straight quotes in place of curly ones and apostrophes in words,
+# and with some marker mistakes and blank lines in each book. Also checks that both ways find the same things.
+# Usage: python benchmarks/bench_structure.py
+
+import time
+import corpus
+import verifyUSFM
+
+patterns = [pattern for patterns in verifyUSFM.scan_patterns.values() for pattern, offset in patterns]
+
+def separately(text):
+    found = {pattern.pattern: [match.span() for match in pattern.finditer(text)] for pattern in patterns}
+    found["'"] = text.count("'")
+    found['"'] = text.count('"')
+    return found
+
+def scanned(text):
+    structure = verifyUSFM.scanStructure(text)
+    found = {pattern.pattern: [match.span() for match in structure[pattern]] for pattern in patterns}
+    found["'"] = structure["'"]
+    found['"'] = structure['"']
+    return found
+
+def quoted(text):
+    return text.replace('“', '"').replace('”', '"').replace('ka ', "ka'")
+
+def mistaken(text):
+    text = text.replace('\n\\v 5 ', '\\v 5 ').replace('\\v 9 ', '\\v9 ').replace('\\c 2\n', '\\c2\n')
+    return text.replace('\n\\p\n', '\n\n')
+
+def best(texts, scan, repeat=5):
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        found = [scan(text) for text in texts]
+        times.append(time.perf_counter() - start)
+    return min(times), found
+
+def main():
+    books = [corpus.book(id) for id in corpus.biblebooks]
+    print(f"{sum(map(len, books))} characters")
+    for title, texts in (("as they are:", books), ("straight quotes:", [quoted(book) for book in books]),
+                         ("mistakes:", [mistaken(book) for book in books])):
+        print(title)
+        results = [("separately", *best(texts, separately)), ("scanned", *best(texts, scanned))]
+        for label, elapsed, found in results:
+            print(f"{label:10s} {elapsed:7.3f}s  {results[0][1] / elapsed:4.1f}x")
+        print("same" if results[0][2] == results[1][2] else "DIFFERENT")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+# Measures tokens per second through verifyUSFM.take() over a synthetic 66 book Bible, verified one book at a time.
+# Compares the handler table that take() uses with the chain of isXXX() tests that it used to make for every token,
+# which is copied below. Also checks that both report the same issues.
+# "dispatch only" times the same two ways of finding the handler, with handlers that do nothing.
+# Usage: python benchmarks/bench_take.py
+
+import gc
+import time
+import corpus
+import parseUsfm
+import verifyUSFM
+from verifyUSFM import isFootnote, isPoetry, isTitleToken
+
+# take() as it was, with its chain of tests.
+def takeChain(token):
+    state = verifyUSFM.state
+    if not token.isTEXT():
+        if not state.addMarker(token):
+            verifyUSFM.reportError(f"Back to back markers of type {token.type} at {state.reference}", 62)
+    else:
+        verifyUSFM.takeText(token.value, state.inFootnote())
+
+    if token.isID():
+        verifyUSFM.takeID(token.value)
+    elif token.isV():
+        verifyUSFM.takeV(token.value)
+    elif token.isC():
+        if not verifyUSFM.suppress[5]:
+            verifyUSFM.verifyVerseCount()  # for the preceding chapter
+        if not state.ID:
+            verifyUSFM.reportError("Missing book ID: " + state.reference + " Cannot check this file.", 62.1)
+            state.canContinue = False
+            return
+        if token.value == "1":
+            verifyUSFM.verifyBookTitle()
+        verifyUSFM.takeC(token.value)
+    elif token.isCL():
+        verifyUSFM.takeCL(token.value)
+    elif token.isP() or token.isPI() or token.isPC() or token.isNB() or token.isM():
+        verifyUSFM.takeP(token.type)
+        if token.value:     # paragraph markers can be followed by text
+            verifyUSFM.reportError("Unexpected: text returned as part of paragraph token." +  state.reference, 63)
+            verifyUSFM.takeText(token.value)
+    elif isFootnote(token):
+        verifyUSFM.takeFootnote(token)
+    elif token.isS5():
+        verifyUSFM.takeS5()
+    elif token.isS() or token.isMR() or token.isMS() or token.isSP():
+        verifyUSFM.takeSection(token.type)
+    elif token.isQA():
+        state.addAcrosticHeading()
+    elif isPoetry(token):
+        verifyUSFM.takeQ(token.type, token.value)
+    elif token.isD():
+        verifyUSFM.takeD()
+    elif token.isB():
+        verifyUSFM.takeB()
+    elif isTitleToken(token):
+        verifyUSFM.takeTitle(token)
+    elif token.isUSFM():    # non-standard USFM token but is used by UnfoldingWord software
+        verifyUSFM.usfm_version = int(token.value[0])
+    elif token.isUnknown():
+        if token.value == "p":
+            verifyUSFM.reportError("Orphaned paragraph marker after " + state.reference, 65)
+        elif token.value == "v":
+            verifyUSFM.reportError("Unnumbered verse after " + state.reference, 66)
+        elif verifyUSFM.usfm_version == 2:
+            verifyUSFM.reportError("Invalid USFM token (\\" + token.value + ") near " + state.reference, 67)
+    verifyUSFM.lastToken = token
+
+def run(books, take):
+    verifyUSFM.config = {'source_dir': "", 'compare_dir': ""}
+    verifyUSFM.state = verifyUSFM.State()
+    verifyUSFM.wordlist = dict()
+    verifyUSFM.recorder = []
+    elapsed = 0
+    for tokens in books:
+        verifyUSFM.lastToken = None
+        verifyUSFM.text_checks = verifyUSFM.textChecks()
+        start = time.perf_counter()
+        for token in tokens:
+            take(token)
+        elapsed += time.perf_counter() - start
+        verifyUSFM.state.addID("")
+    calls = verifyUSFM.recorder
+    verifyUSFM.recorder = None
+    return elapsed, calls
+
+def nothing(token):
+    pass
+
+def dispatchChain(token):
+    if token.isTEXT() or token.isID() or token.isV() or token.isC() or token.isCL() or token.isP() or token.isPI() or \
+       token.isPC() or token.isNB() or token.isM() or isFootnote(token) or token.isS5() or token.isS() or \
+       token.isMR() or token.isMS() or token.isSP() or token.isQA() or isPoetry(token) or token.isD() or \
+       token.isB() or isTitleToken(token) or token.isUSFM() or token.isUnknown():
+        pass
+
+handlers = {key: nothing for key in verifyUSFM.take_handlers}
+
+def dispatchTable(token):
+    handler = handlers.get(token.type) or nothing
+    handler(token)
+
+def main():
+    books = [parseUsfm.parseString(corpus.book(id)) for id in corpus.biblebooks]
+    ntokens = sum(map(len, books))
+    print(f"{ntokens} tokens")
+    tokens = [token for tokens in books for token in tokens]
+    for title, ways in (("take:", (("chain", takeChain, books), ("table", verifyUSFM.take, books))),
+                        ("dispatch only:", (("chain", dispatchChain, [tokens]), ("table", dispatchTable, [tokens])))):
+        print(title)
+        results = {label: [] for label, take, tokenlists in ways}
+        for i in range(5):      # the two ways take turns, so that they see the same conditions
+            for label, take, tokenlists in ways:
+                gc.collect()
+                results[label].append(run(tokenlists, take))
+        base = min(results["chain"])[0]
+        for label, runs in results.items():
+            elapsed = min(runs)[0]
+            print(f"{label:6s} {elapsed:7.3f}s  {ntokens / elapsed:9.0f} tokens/s  {base / elapsed:4.2f}x")
+        if title == "take:":
+            print("same issues" if results["chain"][0][1] == results["table"][0][1] else "DIFFERENT ISSUES")
+
+if __name__ == "__main__":
+    main()
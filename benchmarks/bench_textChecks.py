@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+# Times the punctuation and number checks that verifyUSFM makes on each piece of text, over a synthetic 66 book Bible.
+# Compares skipping the searches that cannot match, as verifyUSFM does, with making every search, as it used to.
+# Also checks that both ways report the same issues.
+# Usage: python benchmarks/bench_textChecks.py
+
+import time
+import corpus
+import parseUsfm
+import verifyUSFM
+
+# Stands in for the set of characters in a piece of text, but makes every check search the text.
+class Unfiltered:
+    def __init__(self, text):
+        self.text = text
+    def isdisjoint(self, other):
+        return False
+    def __contains__(self, c):
+        return c in self.text
+    def __iter__(self):
+        return iter('0')
+
+def checkAll(texts, charset):
+    verifyUSFM.recorder = []
+    start = time.perf_counter()
+    for text in texts:
+        textchars = charset(text)
+        verifyUSFM.reportPunctuation(text, textchars)
+        verifyUSFM.reportNumbers(text, False, textchars)
+    return time.perf_counter() - start, verifyUSFM.recorder
+
+def main():
+    texts = [token.value for token in parseUsfm.parseString(corpus.wholeText(corpus.biblebooks)) if token.isTEXT()]
+    verifyUSFM.state = verifyUSFM.State()
+    verifyUSFM.state.addChapter("1")
+    verifyUSFM.state.addVerse("1")
+    print(f"{len(texts)} pieces of text")
+    results = []
+    for label, charset in (("every search", Unfiltered), ("filtered", set)):
+        best = min(checkAll(texts, charset) for i in range(5))
+        results.append((label, *best))
+    for label, elapsed, issues in results:
+        print(f"{label:13s} {elapsed:7.3f}s  {results[0][1] / elapsed:4.1f}x  {len(issues)} issues")
+    print("same issues" if results[0][2] == results[1][2] else "DIFFERENT ISSUES")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+# Measures the memory held by the tokens of a synthetic 66 book Bible.
+# Compares the __slots__ tokens made by parseUsfm with equivalent tokens that keep type and value in a __dict__,
+# which is how tokens were represented before.
+# Usage: python benchmarks/bench_tokenMemory.py
+
+import tracemalloc
+import corpus
+import parseUsfm
+
+class DictToken:
+    def __init__(self, token):
+        self.value = token.value
+        self.type = token.type
+
+# Returns the number of bytes allocated while calling make(), and the result, which is kept alive.
+# The token values were allocated by the scanner beforehand, so they are not counted.
+def allocated(make):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = make()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+def main():
+    groups = list(parseUsfm.scanString(parseUsfm.clean(corpus.wholeText(corpus.biblebooks))))
+    slotsize, tokens = allocated(lambda: [parseUsfm.createToken(t) for t in groups])
+    dictsize, dicttokens = allocated(lambda: [DictToken(token) for token in tokens])
+    print(f"{len(tokens)} tokens")
+    for label, size in (("with __dict__", dictsize), ("with __slots__", slotsize)):
+        print(f"{label:15s} {size / 2**20:7.1f} MB  {size / len(tokens):6.0f} bytes/token")
+    print(f"reduction {1 - slotsize / dictsize:.0%}")
+
+if __name__ == "__main__":
+    main()
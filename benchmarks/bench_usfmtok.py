@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# Compares loading the tokens of a synthetic 66 book Bible from .usfmtok data with parsing the usfm text.
+# With --pyparsing, the parse with the pyparsing grammar is timed too (it takes a minute or more).
+# Usage: python benchmarks/bench_usfmtok.py [--pyparsing]
+
+import sys
+import time
+import corpus
+import parseUsfm
+
+def best(f, repeat=5):
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        f()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    text = corpus.wholeText(corpus.biblebooks)
+    tokens = parseUsfm.parseString(text)
+    data = parseUsfm.dumpTokens(tokens)
+    print(f"{len(tokens)} tokens, {len(text.encode('utf-8'))} bytes of usfm, {len(data)} bytes of usfmtok")
+    load = best(lambda: parseUsfm.loadTokens(data))
+    results = [("load usfmtok", load),
+               ("dump usfmtok", best(lambda: parseUsfm.dumpTokens(tokens))),
+               ("parse, fast", best(lambda: parseUsfm.parseString(text, engine='fast')))]
+    if "--pyparsing" in sys.argv:
+        results.append(("parse, pyparsing", best(lambda: parseUsfm.parseString(text, engine='pyparsing'), 1)))
+    for label, elapsed in results:
+        print(f"{label:17s} {elapsed:7.3f}s  {elapsed / load:6.1f}x load time")
+
+if __name__ == "__main__":
+    main()
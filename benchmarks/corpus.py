@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+# Generates synthetic usfm books for the benchmarks.
+# The text is random but deterministic, and has the shape of a real translation:
+# headers, section headings, paragraphs, poetry, footnotes, cross references,
+# character styles, and a sprinkling of the mistakes that verifyUSFM reports.
+
+import os
+import random
+import sys
+
+benchmarks_path = os.path.dirname(os.path.realpath(__file__))
+src_path = os.path.join(os.path.dirname(benchmarks_path), "src")
+sys.path.append(src_path)
+import usfm_verses
+
+ntbooks = ['MAT', 'MRK', 'LUK', 'JHN', 'ACT', 'ROM', '1CO', '2CO', 'GAL', 'EPH', 'PHP', 'COL', '1TH', '2TH',
+           '1TI', '2TI', 'TIT', 'PHM', 'HEB', 'JAS', '1PE', '2PE', '1JN', '2JN', '3JN', 'JUD', 'REV']
+
+biblebooks = list(usfm_verses.verseCounts)[:66]
+
+syllables = ['ka', 'lo', 'mi', 'sa', 'tu', 'ne', 'ri', 'po', 'da', 'we', 'yo', 'ha', 'bi', 'gu', 'fe', 'zo']
+punctuation = ['.', '.', '.', ',', ',', ';', '!', '?', ':']
+
+def word(rnd):
+    w = ''.join(rnd.choice(syllables) for i in range(rnd.randint(1, 4)))
+    return w.capitalize() if rnd.random() < 0.08 else w
+
+def sentence(rnd):
+    words = [word(rnd) for i in range(rnd.randint(3, 14))]
+    words[0] = words[0].capitalize()
+    s = ' '.join(words) + rnd.choice(punctuation)
+    r = rnd.random()
+    if r < 0.05:
+        s = '“' + s + '”'
+    elif r < 0.07:
+        s = s.replace(' ', ' , ', 1)     # space before comma
+    elif r < 0.08:
+        s += ' 12'
+    return s
+
+def verse(rnd):
+    text = ' '.join(sentence(rnd) for i in range(rnd.randint(1, 3)))
+    r = rnd.random()
+    if r < 0.06:
+        text += f" \\f + \\fr 1:1 \\ft {sentence(rnd)}\\f*"
+    elif r < 0.09:
+        text = f"\\wj {text}\\wj*"
+    elif r < 0.11:
+        text += f" \\x - \\xo 1:1 \\xt {word(rnd)} 2:3\\x*"
+    elif r < 0.13:
+        text = text.replace(' ', ' \\add ', 1) + '\\add*'
+    return text
+
+# Returns the usfm text for one book.
+def book(id):
+    rnd = random.Random(id)
+    name = usfm_verses.verseCounts[id]['en_name']
+    title = word(rnd).capitalize()
+    lines = [f"\\id {id} synthetic benchmark text", "\\ide UTF-8", f"\\h {title}",
+             f"\\toc1 {title} {word(rnd)}", f"\\toc2 {title}", f"\\toc3 {id.title()}", f"\\mt {title}", ""]
+    for c, nverses in enumerate(usfm_verses.verseCounts[id]['verses'], start=1):
+        lines.append(f"\\c {c}")
+        if rnd.random() < 0.5:
+            lines.append(f"\\s {word(rnd).capitalize()} {word(rnd).capitalize()}")
+        lines.append("\\p")
+        poetry = False
+        for v in range(1, nverses + 1):
+            r = rnd.random()
+            if r < 0.1 and v > 1:
+                lines.append("\\p")
+                poetry = False
+            elif r < 0.13 and v > 1:
+                lines.append(f"\\s {word(rnd).capitalize()} {word(rnd).capitalize()}")
+                lines.append("\\p")
+            elif r < 0.16:
+                poetry = not poetry
+                lines.append("\\q1" if poetry else "\\p")
+            lines.append(f"\\v {v} {verse(rnd)}")
+            if poetry:
+                lines.append(f"\\q2 {sentence(rnd)}")
+        lines.append("")
+    return '\n'.join(lines) + '\n'
+
+# Writes the specified books (default: the New Testament) as .usfm files into folder.
+# Returns the list of paths.
+def writeBooks(folder, books=ntbooks):
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for id in books:
+        path = os.path.join(folder, f"{usfm_verses.verseCounts[id]['usfm_number']}-{id}.usfm")
+        with open(path, "w", encoding="utf-8", newline='\n') as output:
+            output.write(book(id))
+        paths.append(path)
+    return paths
+
+# Returns the text of the specified books (default: the New Testament), concatenated.
+# Pass books=biblebooks for all 66 books.
+def wholeText(books=ntbooks):
+    return ''.join(book(id) for id in books)
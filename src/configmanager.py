@@ -136,7 +136,11 @@ class ToolsConfigManager:
                        'suppress9': False,
                        'suppress10': False,
                        'suppress11': False,
-                       'suppress12': False, }
+                       'suppress12': False,
+                       'workers': 1,        # number of processes that verify files in parallel
+                       'cache': False,      # reuse the results for files that have not changed
+                       'issues_jsonl': False,       # also write issues.jsonl
+                       'profile': "", }     # "table", "json" or "pstats" to time the checks
             case 'Word2text':
                 sec = {'source_dir': "",
                        'filename': "",
@@ -51,10 +51,8 @@ class State:
 
     def addFile(self, fname):
         self.reset_data(fname)
-        ## Open output USFM file for writing.
-        global config
-        tmpPath = os.path.join(config['source_dir'], fname + ".tmp")
-        self.usfm = usfmWriter.usfmWriter(tmpPath)
+        ## Output USFM is kept in memory until it is known to differ from the input file.
+        self.usfm = usfmWriter.usfmWriter()
 
     def addID(self, id):
         self.ID = id
@@ -358,13 +356,13 @@ def convertFile(usfmpath, fname):
         take(token, token)
         state.usfmClose()
         if nCopied > startn or nRemoved > startnRemoved:
-            renameUsfmFiles(usfmpath)
+            state.usfm.commit(usfmpath)
         else:
             sys.stdout.write(f"  No changes to {fname}\n")
-            removeTempFiles(usfmpath)
+            removeBackupFile(usfmpath)
     else:
         state.usfmClose()
-        removeTempFiles(usfmpath)
+        removeBackupFile(usfmpath)
     return success
 
 # Converts the book or books contained in the specified folder
@@ -386,21 +384,11 @@ def backupUsfmFile(path):
     if not os.path.isfile(bakpath):
         shutil.copyfile(path, bakpath)
 
-# Deletes temp file and backup file, and leaves original file unchanged.
-def removeTempFiles(path):
-    tmppath = path + ".tmp"
-    os.remove(tmppath)
+# Deletes backup file, and leaves original file unchanged.
+def removeBackupFile(path):
     bakpath = path + "orig"
     os.remove(bakpath)
 
-# Renames temp usfmfile to its original name, overwriting the original usfm file.
-def renameUsfmFiles(usfmpath):
-    tmppath = usfmpath + ".tmp"
-    if os.path.isfile(tmppath):
-        if os.path.isfile(usfmpath):
-            os.remove(usfmpath)
-        os.rename(tmppath, usfmpath)
-
 # If issues.txt file is not already open, opens it for writing.
 # Overwrites existing issues.txt file, if any.
 # Returns new file pointer.
@@ -1,360 +1,385 @@
 # -*- coding: utf-8 -*-
 
+import array
+import bisect
+import hashlib
+import os
+import pickle
+import re
+import struct
 import sys
-from pyparsing import Word, OneOrMore, nums, Literal, White, Group, \
-        Suppress, NoMatch, Optional, CharsNotIn, MatchFirst
-
-
-# A usfm token not necessarily followed by anything
-def usfmToken(key):
-    return Group(Suppress(backslash) + Literal(key) + Suppress(White()))
-
-# Literal backslash
-def usfmBackslashToken(key):
-    return Group(Literal(key))
-
-# A terminating token, always ending with '*'
-def usfmEndToken(key):
-    return Group(Suppress(backslash) + Literal(key + '*'))
-
-# A token that is followed by a value on the same line
-def usfmTokenValue(key, value):
-    return Group(Suppress(backslash) + Literal(key) + Suppress(White()) + Optional(value))
-
-# Chapter or verse token
-def usfmTokenNumber(key):
-    return Group(Suppress(backslash) + Literal(key) + Suppress(White()) + Word(nums + '-') + Suppress(White()))
-
-
-# Define grammar
-# NOTE: We separate fields like \mt and \mt1, \s and \s1
-#           so that we could conceivably rewrite the file without changing the convention used
-#           even though it does increase the complexity a little.
-
-# phrase = Word(alphas + "-.,!? —–‘“”’;:()'\"[]/&%=*…{}" + nums)
-phrase    = CharsNotIn('\n\\')
-backslash = Literal('\\')
-plus      = Literal('+')
-
-textBlock = Group(Optional(NoMatch(), "text") + phrase)
-unknown   = Group(Optional(NoMatch(), "unknown") + Suppress(backslash) + CharsNotIn(' \n\t\\'))
-escape    = usfmTokenValue('\\', phrase)
-
-id      = usfmTokenValue("id", phrase)
-ide     = usfmTokenValue("ide", phrase)
-usfmV   = usfmTokenValue('usfm', phrase) # USFM version marker (new with USFM 3.0)
-h       = usfmTokenValue("h", phrase)
-
-mt      = usfmTokenValue("mt", phrase)
-mt1     = usfmTokenValue("mt1", phrase)
-mt2     = usfmTokenValue("mt2", phrase)
-mt3     = usfmTokenValue("mt3", phrase)
-mte     = usfmTokenValue("mte", phrase)
-
-ms      = usfmTokenValue('ms', phrase)
-ms1     = usfmTokenValue('ms1', phrase)
-ms2     = usfmTokenValue('ms2', phrase)
-mr      = usfmTokenValue('mr', phrase)
-
-s       = usfmTokenValue("s", phrase)
-s1      = usfmTokenValue("s1", phrase)
-s2      = usfmTokenValue("s2", phrase)
-s3      = usfmTokenValue("s3", phrase)
-s4      = usfmTokenValue("s4", phrase)
-s5      = usfmTokenValue("s5", phrase)
-
-sr      = usfmTokenValue("sr", phrase)
-sts     = usfmTokenValue("sts", phrase)
-r       = usfmTokenValue("r", phrase)
-p       = usfmToken("p")
-pc      = usfmToken("pc")
-pi      = usfmToken('pi')
-pi1     = usfmToken('pi1')
-pi2     = usfmToken('pi2')
-cls     = usfmToken('cls')
-
-b       = usfmToken("b")
-c       = usfmTokenNumber("c")
-ca_s     = usfmToken("ca")
-ca_e     = usfmEndToken("ca")
-cl      = usfmTokenValue("cl", phrase)
-cp      = usfmTokenValue("cp", phrase)
-v       = usfmTokenNumber('v')
-va_s     = usfmToken('va')
-va_e     = usfmEndToken('va')
-vp_s     = usfmToken('vp')
-vp_e     = usfmEndToken('vp')
-
-k_s     = usfmToken("k")
-k_e     = usfmEndToken("k")
-
-q       = usfmToken('q')
-q1      = usfmToken('q1')
-q2      = usfmToken('q2')
-q3      = usfmToken('q3')
-q4      = usfmToken('q4')
-
-qa      = usfmToken("qa")
-qac     = usfmToken("qac")
-qc      = usfmToken("qc")
-qm      = usfmToken("qm")
-qm1     = usfmToken("qm1")
-qm2     = usfmToken("qm2")
-qm3     = usfmToken("qm3")
-qr      = usfmToken("qr")
-qs_s    = usfmToken("qs")
-qs_e    = usfmEndToken("qs")
-qt_s    = usfmToken("qt")
-qt_e    = usfmEndToken("qt")
-nb      = usfmToken("nb")
-m       = usfmToken("m")
-
-# Footnotes
-f_s      = usfmTokenValue("f", plus)
-f_e      = usfmEndToken("f")
-fe_s     = usfmTokenValue("fe", plus)
-fe_e     = usfmEndToken("fe")
-fr      = usfmTokenValue("fr", phrase)
-fk      = usfmTokenValue("fk", phrase)
-ft      = usfmTokenValue("ft", phrase)
-fp      = usfmToken("fp")
-fq      = usfmTokenValue("fq", phrase)
-fqa     = usfmTokenValue("fqa", phrase)
-fqa_e    = usfmEndToken('fqa')
-fv      = usfmTokenValue('fv', phrase)
-fv_e     = usfmEndToken('fv')
-fdc     = usfmTokenValue('fdc', phrase)
-fdc_e    = usfmEndToken('fdc')
 
-# Cross References
-xs      = usfmTokenValue("x", plus)
-xe      = usfmEndToken("x")
-xdc_s    = usfmToken('xdc')
-xdc_e    = usfmEndToken('xdc')
-xo      = usfmTokenValue("xo", phrase)
-xq      = usfmTokenValue("xq", phrase)
-
-# NOTE: xt can occur outside of cross-references
-# Not sure if this is the best way to handle it? (RJH May 2019)
-xt      = usfmTokenValue('xt', phrase)
-xt_e    = usfmEndToken('xt')
-xtnested      = usfmTokenValue('+xt', phrase)
-xtnested_e    = usfmEndToken('+xt')
-
-wj_s     = usfmToken('wj')
-wj_e     = usfmEndToken('wj')
-
-# Transliterated
-tl_s      = usfmToken('tl')
-tl_e      = usfmEndToken('tl')
-
-# Small caps
-sc_s      = usfmToken('sc')
-sc_e      = usfmEndToken('sc')
-
-# Italics
-ist     = usfmToken("it")
-ien     = usfmEndToken("it")
-
-# Bold
-bd_s    = usfmToken('bd')
-bd_e    = usfmEndToken('bd')
-bdit_s  = usfmToken('bdit')
-bdit_e  = usfmEndToken('bdit')
-
-li      = usfmToken("li")
-li1     = usfmToken("li1")
-li2     = usfmToken("li2")
-li3     = usfmToken("li3")
-li4     = usfmToken("li4")
-
-d       = usfmTokenValue("d", phrase)
-sp      = usfmTokenValue("sp", phrase)
-add_s    = usfmToken('add')
-add_e    = usfmEndToken('add')
-nd_s     = usfmToken('nd')
-nd_e     = usfmEndToken('nd')
-pn_s    = usfmToken("pn")
-pn_e    = usfmEndToken("pn")
-rq_s     = usfmTokenValue('rq', phrase)
-rq_e     = usfmEndToken('rq')
-w_s     = usfmToken('w')
-w_e     = usfmEndToken('w')
-pbr     = usfmBackslashToken('\\\\')
-mi      = usfmToken('mi')
-
-# Comments
-rem     = usfmTokenValue("rem", phrase)
-
-# Tables
-tr      = usfmToken("tr")
-th1     = usfmToken("th1")
-th2     = usfmToken("th2")
-th3     = usfmToken("th3")
-th4     = usfmToken("th4")
-th5     = usfmToken("th5")
-th6     = usfmToken("th6")
-thr1    = usfmToken("thr1")
-thr2    = usfmToken("thr2")
-thr3    = usfmToken("thr3")
-thr4    = usfmToken("thr4")
-thr5    = usfmToken("thr5")
-thr6    = usfmToken("thr6")
-tc1     = usfmToken("tc1")
-tc2     = usfmToken("tc2")
-tc3     = usfmToken("tc3")
-tc4     = usfmToken("tc4")
-tc5     = usfmToken("tc5")
-tc6     = usfmToken("tc6")
-tcr1    = usfmToken("tcr1")
-tcr2    = usfmToken("tcr2")
-tcr3    = usfmToken("tcr3")
-tcr4    = usfmToken("tcr4")
-tcr5    = usfmToken("tcr5")
-tcr6    = usfmToken("tcr6")
-
-# Table of Contents
-toc     = usfmTokenValue("toc", phrase)
-toc1    = usfmTokenValue("toc1", phrase)
-toc2    = usfmTokenValue("toc2", phrase)
-toc3    = usfmTokenValue("toc3", phrase)
-
-# Introductory Materials
-is0     = usfmTokenValue('is', phrase) # 'is' is a Python keyword so can't be used here
-is1     = usfmTokenValue('is1', phrase)
-is2     = usfmTokenValue('is2', phrase)
-is3     = usfmTokenValue('is3', phrase)
-
-ip      = usfmToken('ip')
-ipi     = usfmToken('ipi')
-im      = usfmToken('im')
-imi     = usfmToken('imi')
-iot     = usfmToken("iot")
-io1     = usfmToken("io1") | usfmToken("io")
-io2     = usfmToken("io2")
-ior_s   = usfmToken("ior")
-ior_e   = usfmEndToken("ior")
-
-imt     = usfmTokenValue('imt', phrase)
-imt1    = usfmTokenValue('imt1', phrase)
-imt2    = usfmTokenValue('imt2', phrase)
-imt3    = usfmTokenValue('imt3', phrase)
-ie      = usfmToken('ie')
-
-# Quoted book title
-bk_s    = usfmToken("bk")
-bk_e    = usfmEndToken("bk")
-# Key term
-k_s     = usfmToken("k")
-k_e     = usfmEndToken("k")
-# Peripherals
-periph = usfmTokenValue("periph", phrase)
-
-# Other paragraph types
-pm = usfmToken("pm")
-pmo = usfmToken("pmo")
-pmc = usfmToken("pmc")
-pmr = usfmToken("pmr")
-
-element =  MatchFirst([ide, id,
-                       usfmV, h,
-                       toc, toc1, toc2, toc3,
-                       mt, mt1, mt2, mt3,
-                       mte,
-                       ms, ms1, ms2,
-                       imt, imt1, imt2, imt3,
-                       ie,
-                       mr,
-                       s, s1, s2, s3, s4, s5,
-                       sr,
-                       sts,
-                       r,
-                       p,
-                       pc,
-                       pi, pi1, pi2,
-                       cls,
-                       mi,
-                       b,
-                       ca_s, ca_e,
-                       c,
-                       cl, cp,
-                       va_s, va_e, vp_s, vp_e,
-                       v,
-                       wj_s, wj_e,
-                       nd_s, nd_e,
-                       q, q1, q2, q3, q4,
-                       qa,
-                       qac,
-                       qc,
-                       qm, qm1, qm2, qm3,
-                       qr,
-                       qs_s, qs_e,
-                       qt_s, qt_e,
-                       nb,
-                       m,
-                       f_s, f_e,
-                       fe_s, fe_e,
-                       fr,
-                       fk,
-                       ft,
-                       fq,
-                       fqa, fqa_e,
-                       fp,
-                       fv, fv_e,
-                       fdc, fdc_e,
-                       xs, xe,
-                       xdc_s, xdc_e,
-                       xo,
-                       xq,
-                       xt, xt_e, xtnested, xtnested_e,
-                       ist,
-                       ien,
-                       wj_s, wj_e,
-                       bd_s, bd_e,
-                       bdit_s, bdit_e,
-                       li, li1, li2, li3, li4,
-                       d,
-                       sp,
-                       add_s, add_e,
-                       pn_s, pn_e,
-                       rq_s, rq_e,
-                       w_s, w_e,
-                       tl_s, tl_e,
-                       is0, is1, is2, is3,
-                       ip, ipi,
-                       im,
-                       imi,
-                       iot, io1, io2,
-                       ior_s, ior_e,
-                       k_s, k_e,
-                       bk_s, bk_e,
-                       sc_s, sc_e,
-                       pbr,
-                       rem,
-                       tr,
-                       th1, th2, th3, th4, th5, th6,
-                       thr1, thr2, thr3, thr4, thr5, thr6,
-                       tc1, tc2, tc3, tc4, tc5, tc6,
-                       tcr1, tcr2, tcr3, tcr4, tcr5, tcr6,
-                       textBlock,
-                       escape,
-                       periph,
-                       pm, pmo, pmc, pmr,
-                       unknown])
-
-usfm    = OneOrMore(element)
+# Selects the tokenizer used by parseString().
+#   'fast'      - the single pass scanner below (default)
+#   'pyparsing' - the original grammar in usfm_grammar.py, kept for differential testing
+default_engine = 'fast'
 
 # input string
-def parseString(unicodeString):
+# With offsets=True, the tokens refer to their values in the cleaned input instead of holding copies,
+# and token.position() gives the line and column of each token. The fast tokenizer is always used then.
+# Normally a parse error ends the program. If diagnostics is a list, the parse recovers instead:
+# it skips the bad input, and appends a Diagnostic to the list for each error.
+# The fast tokenizer is always used then too.
+def parseString(unicodeString, engine=None, offsets=False, diagnostics=None):
+    if offsets:
+        return offsetTokens(unicodeString, 1, diagnostics)
+    if diagnostics is not None:
+        return [createToken(t) for t in recoveringGroups(clean(unicodeString, diagnostics), diagnostics)]
     try:
-        s = clean(unicodeString)
-        tokens = usfm.parseString(s, parseAll=True)
+        tokens = list(tokenGroups(clean(unicodeString), engine))
     except Exception as e:
         print(e)
         print(repr(unicodeString[:50]))
         sys.exit()
     return [createToken(t) for t in tokens]
 
+# Generates tokens from a string or from a text file object, one chapter at a time.
+# Peak memory is bounded by the largest chapter rather than the whole input,
+# and the first tokens are available before the rest of the input has been read.
+# Yields the same token sequence as parseString().
+def iterTokens(input, engine=None, offsets=False, diagnostics=None):
+    line = 1
+    for piece in chapterPieces(input):
+        if offsets:
+            yield from offsetTokens(piece, line, diagnostics)
+        elif diagnostics is not None:
+            for t in recoveringGroups(clean(piece, diagnostics, line), diagnostics, line):
+                yield createToken(t)
+        else:
+            yield from pieceTokens(piece, engine)
+        line += piece.count('\n')
+
+# Returns the list of tokens for one piece yielded by chapterPieces().
+def pieceTokens(piece, engine=None):
+    if not piece.strip(' \t\r\n'):
+        return []
+    try:
+        tokens = list(tokenGroups(clean(piece), engine))
+    except Exception as e:
+        print(e)
+        print(repr(piece[:50]))
+        sys.exit()
+    return [createToken(t) for t in tokens]
+
+# Parses a string in several processes, for large books and whole Bibles in one file.
+# The string is split into chapter pieces, as in iterTokens(), so a header before the first \c marker
+# is a piece of its own and no marker straddles two pieces. The pieces are tokenized by a pool of
+# worker processes (default: one per CPU) and the tokens are concatenated in order.
+# Returns the same list as parseString().
+def parseParallel(unicodeString, workers=None, engine=None):
+    pieces = list(chapterPieces(unicodeString))
+    workers = min(workers or os.cpu_count() or 1, len(pieces))
+    if workers <= 1:
+        return [token for piece in pieces for token in pieceTokens(piece, engine)]
+    engine = engine or default_engine     # the workers may not share our globals
+    import concurrent.futures       # not imported at the top, as it takes longer than the rest of this module
+    try:
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            chunksize = max(1, len(pieces) // (workers * 4))
+            results = list(executor.map(pieceGroups, pieces, [engine] * len(pieces), chunksize=chunksize))
+    except Exception as e:
+        print(e)
+        print(repr(unicodeString[:50]))
+        sys.exit()
+    return [createToken(t) for groups in results for t in groups]
+
+# Returns the token groups for one piece yielded by chapterPieces(), as a picklable list of tuples.
+# Runs in the worker processes of parseParallel().
+def pieceGroups(piece, engine):
+    if not piece.strip(' \t\r\n'):
+        return []
+    return [tuple(t) for t in tokenGroups(clean(piece), engine)]
+
+# Parses a string one chapter at a time, reusing the tokens of chapters that have not changed
+# since an earlier parse. Only the chapters whose text changed are tokenized again.
+# previous is the chapter list returned by the earlier call, or None for a full parse.
+# Returns (tokens, chapters), where tokens is the same list parseString() returns,
+# and chapters is a list of (hash, tokens) pairs to pass to the next call.
+# The token objects of unchanged chapters are shared with the earlier parse.
+def parseIncremental(unicodeString, previous=None, engine=None):
+    earlier = dict(previous) if previous else {}
+    tokens = []
+    chapters = []
+    for piece in chapterPieces(unicodeString):
+        key = hashlib.blake2b(piece.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+        chapterTokens = earlier.get(key)
+        if chapterTokens is None:
+            chapterTokens = pieceTokens(piece, engine)
+        chapters.append((key, chapterTokens))
+        tokens.extend(chapterTokens)
+    return tokens, chapters
+
+# Returns the list of offset tokens for a string, whose first line is numbered line.
+def offsetTokens(unicodeString, line=1, diagnostics=None):
+    text = clean(unicodeString, diagnostics, line).expandtabs()
+    if diagnostics is not None:
+        spans = list(recoveringSpans(text, diagnostics, line))
+    else:
+        try:
+            spans = cached(text, 'spans', lambda: list(scanSpans(text)))
+        except Exception as e:
+            print(e)
+            print(repr(unicodeString[:50]))
+            sys.exit()
+    source = SourceText(text, line)
+    return [createOffsetToken(span, source) for span in spans]
+
+# Returns the token groups for a cleaned string, using the specified engine.
+# Each engine has its own cache entries, so that the engines can still be compared when the cache is on.
+def tokenGroups(s, engine=None):
+    if cache_dir:
+        engine = engine or default_engine
+        return cached(s, 'groups ' + engine, lambda: [tuple(t) for t in tokenize(s, engine)])
+    return tokenize(s, engine)
+
+def tokenize(s, engine=None):
+    if (engine or default_engine) == 'pyparsing':
+        import usfm_grammar     # the grammar is built on first use
+        return usfm_grammar.usfm.parseString(s, parseAll=True)
+    return scanString(s.expandtabs())   # pyparsing also expands tabs before parsing
+
+# Returns the token groups for a cleaned string whose first line is numbered line, recovering from errors.
+# Appends a Diagnostic to diagnostics for each error.
+def recoveringGroups(s, diagnostics, line=1):
+    def scan():
+        text = s.expandtabs()
+        found = []
+        groups = [(name, text[start:end]) if end > start else (name,)
+                  for name, pos, start, end in recoveringSpans(text, found, line)]
+        return groups, found
+    groups, found = cached(s, f'recovering {line}', scan)
+    diagnostics.extend(found)
+    return groups
+
+# Like scanSpans(), but after an error it skips the offending backslash and carries on
+# with whatever text or marker follows.
+# Appends a Diagnostic to diagnostics for each error.
+def recoveringSpans(s, diagnostics, line=1):
+    pos = 0
+    while True:
+        try:
+            yield from scanSpans(s, pos)
+            return
+        except UsfmSyntaxError as e:
+            errline, column = SourceText(s, line).position(e.offset)
+            diagnostics.append(Diagnostic(e.offset, errline, column, e.message))
+            pos = e.offset + 1
+
+# A problem found by a recovering parse.
+# offset is the position of the problem in the cleaned text; line and column are 1-based.
+# kind is 'syntax' for parse errors, or 'nul' for null characters in the input.
+class Diagnostic:
+    def __init__(self, offset, line, column, message, kind='syntax'):
+        self.offset = offset
+        self.line = line
+        self.column = column
+        self.message = message
+        self.kind = kind
+
+    def __repr__(self):
+        return f'Diagnostic({self.offset}, {self.line}, {self.column}, {self.message!r}, {self.kind!r})'
+
+    def __str__(self):
+        return f'line {self.line}, column {self.column}: {self.message}'
+
+# Optional on-disk cache of token groups, so that unchanged files are not tokenized again
+# by every tool in the pipeline. Off by default. Turn it on with setCache(), or by setting
+# the USFM_PARSE_CACHE environment variable to a folder.
+# Entries are keyed by a hash of the cleaned text and the parser version. When the cache grows past
+# its maximum size, the least recently used entries are removed.
+parser_version = 1      # increment when the tokens produced for a given text change
+cache_dir = None
+cache_maxsize = 256 * 2**20
+cache_size = None       # approximate total size of the entries, in bytes
+
+def setCache(path, maxsize=256 * 2**20):
+    global cache_dir, cache_maxsize, cache_size
+    cache_dir = path
+    cache_maxsize = maxsize
+    cache_size = None
+
+# Returns the cached result for text, or stores and returns make() if there is none.
+# The kind of result is part of the key.
+def cached(text, kind, make):
+    if not cache_dir:
+        return make()
+    key = hashlib.blake2b(f"{parser_version} {kind}\n{text}".encode('utf-8', 'surrogatepass'), digest_size=20).hexdigest()
+    path = os.path.join(cache_dir, key + ".tok")
+    try:
+        with open(path, "rb") as file:
+            result = pickle.load(file)
+        os.utime(path)      # most recently used
+        return result
+    except Exception:
+        pass        # not cached, or unreadable
+    result = make()
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmppath = f"{path}.{os.getpid()}.tmp"
+        with open(tmppath, "wb") as file:
+            pickle.dump(result, file, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmppath, path)
+        addToCache(os.path.getsize(path))
+    except OSError:
+        pass        # the cache is only an optimization
+    return result
+
+# Adds size to the total size of the cache. Removes the least recently used entries if the total is too big.
+def addToCache(size):
+    global cache_size
+    if cache_size is None:
+        cache_size = sum(entry.stat().st_size for entry in os.scandir(cache_dir) if entry.name.endswith(".tok"))
+    else:
+        cache_size += size
+    if cache_size > cache_maxsize:
+        entries = sorted((entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                         for entry in os.scandir(cache_dir) if entry.name.endswith(".tok"))
+        cache_size = sum(size for mtime, size, path in entries)
+        for mtime, size, path in entries:
+            if cache_size <= cache_maxsize * 0.9:
+                break
+            try:
+                os.remove(path)
+                cache_size -= size
+            except OSError:
+                pass
+
+chapterstart_re = re.compile(r'(?<=\n)\\c\s')
+chapterline_re = re.compile(r'\\c\s')
+
+# Splits a string or text file into pieces that start at chapter markers.
+# Only \c markers at the beginning of a line are used, so every piece but the last ends with a newline
+# and the next one starts with a backslash. No token can span that boundary, so the pieces
+# may be cleaned and tokenized independently.
+def chapterPieces(input):
+    if isinstance(input, str):
+        start = 0
+        for chap in chapterstart_re.finditer(input):
+            yield input[start:chap.start()]
+            start = chap.start()
+        yield input[start:]
+    else:
+        lines = []
+        for line in input:
+            if lines and chapterline_re.match(line):
+                yield ''.join(lines)
+                lines = []
+            lines.append(line)
+        yield ''.join(lines)
+
+# Marker forms recognized by the fast tokenizer. These mirror the pyparsing grammar in usfm_grammar.py:
+#   PLAIN  - usfmToken(), marker followed by white space
+#   VALUE  - usfmTokenValue(key, phrase), marker followed by white space and optional text to end of line
+#   PLUS   - usfmTokenValue(key, plus), marker followed by white space and optional '+'
+#   NUMBER - usfmTokenNumber(), marker followed by a chapter or verse number and white space
+FORM_PLAIN = 1
+FORM_VALUE = 2
+FORM_PLUS = 3
+FORM_NUMBER = 4
+
+startForms = {key: FORM_PLAIN for key in (
+    'p', 'pc', 'pi', 'pi1', 'pi2', 'cls', 'mi', 'b', 'nb', 'm', 'ie',
+    'ca', 'va', 'vp', 'wj', 'nd', 'k', 'bk', 'sc', 'tl', 'it', 'bd', 'bdit', 'add', 'pn', 'w',
+    'q', 'q1', 'q2', 'q3', 'q4', 'qa', 'qac', 'qc', 'qm', 'qm1', 'qm2', 'qm3', 'qr', 'qs', 'qt',
+    'fp', 'xdc', 'li', 'li1', 'li2', 'li3', 'li4',
+    'tr', 'th1', 'th2', 'th3', 'th4', 'th5', 'th6', 'thr1', 'thr2', 'thr3', 'thr4', 'thr5', 'thr6',
+    'tc1', 'tc2', 'tc3', 'tc4', 'tc5', 'tc6', 'tcr1', 'tcr2', 'tcr3', 'tcr4', 'tcr5', 'tcr6',
+    'ip', 'ipi', 'im', 'imi', 'iot', 'io', 'io1', 'io2', 'ior', 'pm', 'pmo', 'pmc', 'pmr')}
+startForms.update({key: FORM_VALUE for key in (
+    'id', 'ide', 'usfm', 'h', 'toc', 'toc1', 'toc2', 'toc3', 'mt', 'mt1', 'mt2', 'mt3', 'mte',
+    'ms', 'ms1', 'ms2', 'mr', 's', 's1', 's2', 's3', 's4', 's5', 'sr', 'sts', 'r', 'cl', 'cp',
+    'fr', 'fk', 'ft', 'fq', 'fqa', 'fv', 'fdc', 'xo', 'xq', 'xt', '+xt', 'd', 'sp', 'rq', 'rem',
+    'imt', 'imt1', 'imt2', 'imt3', 'is', 'is1', 'is2', 'is3', 'periph')})
+startForms.update({key: FORM_PLUS for key in ('f', 'fe', 'x')})
+startForms.update({key: FORM_NUMBER for key in ('c', 'v')})
+
+# Terminating markers, always ending with '*'
+endMarkers = {'ca*', 'va*', 'vp*', 'wj*', 'nd*', 'k*', 'bk*', 'sc*', 'tl*', 'it*', 'bd*', 'bdit*',
+              'add*', 'pn*', 'rq*', 'w*', 'qs*', 'qt*', 'f*', 'fe*', 'fqa*', 'fv*', 'fdc*',
+              'x*', 'xdc*', 'xt*', '+xt*', 'ior*'}
+
+# White space between elements is limited to the four characters that pyparsing skips by default.
+# Like pyparsing's White(), the white space after a marker may be preceded by other unicode spaces.
+otherspace = '\x0c\xa0\u1680\u180e\u2000-\u200b\u202f\u205f\u3000'
+space_re = re.compile(r'[ \t\r\n]*')
+white_re = re.compile(f'[{otherspace}]*[ \t\r\n]+')
+phrase_re = re.compile(r'[^\n\\]+')
+markername_re = re.compile(f'[^ \t\r\n\\\\*{otherspace}]*')
+unknown_re = re.compile(r'[^ \n\t\\]+')
+number_re = re.compile(f'([0-9\\-]+)[{otherspace}]*[ \t\r\n]+')
+
+# Scans a cleaned usfm string in one linear pass.
+# Yields the same groups as the pyparsing grammar, e.g. ('v', '1'), ('p',), ('text', 'In the beginning').
+# Raises UsfmSyntaxError at a backslash that cannot start any element.
+def scanString(s):
+    for name, pos, start, end in scanSpans(s):
+        yield (name, s[start:end]) if end > start else (name,)
+
+# Raised by the scanner at a backslash that cannot start any element.
+class UsfmSyntaxError(ValueError):
+    def __init__(self, message, offset):
+        super().__init__(message, offset)
+        self.message = message
+        self.offset = offset
+
+    def __str__(self):
+        return f"{self.message} (at char {self.offset})"
+
+# Does the scanning for scanString(), without copying anything from s but the marker names.
+# Yields (name, pos, start, end) for each element, where pos is the offset of the element in s
+# and s[start:end] is its value. Elements without a value have start == end.
+# Scanning starts at offset pos.
+def scanSpans(s, pos=0):
+    n = len(s)
+    while True:
+        pos = space_re.match(s, pos).end()
+        if pos >= n:
+            break
+        if s[pos] != '\\':
+            end = phrase_re.match(s, pos).end()
+            yield ('text', pos, pos, end)
+            pos = end
+            continue
+        if s.startswith('\\', pos + 1):    # escaped backslash
+            yield ('\\\\', pos, pos + 2, pos + 2)
+            pos += 2
+            continue
+        end = markername_re.match(s, pos + 1).end()
+        name = s[pos+1:end]
+        span = None
+        if end < n:
+            if s[end] == '*':
+                if name + '*' in endMarkers:
+                    end += 1
+                    span = (name + '*', pos, end, end)
+            elif (form := startForms.get(name)) and (white := white_re.match(s, end)):
+                end = white.end()
+                if form == FORM_PLAIN:
+                    span = (name, pos, end, end)
+                elif form == FORM_VALUE:
+                    if value := phrase_re.match(s, end):
+                        span = (name, pos, end, value.end())
+                        end = value.end()
+                    else:
+                        span = (name, pos, end, end)
+                elif form == FORM_PLUS:
+                    if s.startswith('+', end):
+                        span = (name, pos, end, end + 1)
+                        end += 1
+                    else:
+                        span = (name, pos, end, end)
+                elif number := number_re.match(s, end):
+                    span = (name, pos, end, number.end(1))
+                    end = number.end()
+        if not span:
+            unknown = unknown_re.match(s, pos + 1)
+            if not unknown:
+                raise UsfmSyntaxError("Expected usfm marker after backslash", pos)
+            end = unknown.end()
+            span = ('unknown', pos, pos + 1, end)
+        yield span
+        pos = end
+
 #def parseString(unicodeString):
 #    """
 #    version of parseString for use in libraries
@@ -365,41 +390,220 @@ def parseString(unicodeString):
 #    tokens = usfm.parseString(cleaned, parseAll=True)
 #    return [createToken(t) for t in tokens]
 
-def clean(unicodeString):
-    # We need to clean the input a bit. For a start, until
-    # we work out what to do, non breaking spaces will be ignored
-    # ie 0xa0
-    ret_value = unicodeString.replace('\xa0', ' ')
-
-    # escape illegal USFM sequences
-    ret_value = ret_value.replace('\\\\', '\\ \\ ')  # replace so pyparsing doesn't crash, but still get warnings
-    ret_value = ret_value.replace('\\ ',  '\\\\ ')
-    ret_value = ret_value.replace('\\\n', '\\\\\n')
-    ret_value = ret_value.replace('\\\r', '\\\\\r')
-    ret_value = ret_value.replace('\\\t', '\\\\\t')
-
-    # check edge case if backslash is at end of line
-    l = len(ret_value)
-    if (l > 0) and (ret_value[l-1] == '\\'):
-        ret_value += '\\'  # escape it
-
+# The rewrites made by clean(), all matched by one regular expression.
+# Non breaking spaces are ignored (0xa0 becomes a space), a byte order mark at the start is removed,
+# and CRLF line endings become LF.
+# Backslashes that cannot start a marker are escaped, so the parse doesn't fail, but we still get warnings:
+# a double backslash becomes two escaped backslashes, each followed by a space, and a backslash
+# before white space or at the end of the string is doubled.
+# Null characters are matched only to count them.
+# The expression starts with a character set, which lets the regex engine skip quickly to the next candidate.
+# The lookbehinds then select the branch for the character that was found.
+clean_re = re.compile(r'[\\\xa0\x00\r\ufeff](?:(?<=\\)(?:\\|(?=[ \t\r\n\xa0]|\Z))|(?<=[\xa0\x00\ufeff])|(?<=\r)\n)')
+cleanings = {'\\\\': '\\\\ \\\\ ', '\\': '\\\\', '\xa0': ' ', '\r\n': '\n', '\x00': '\x00', '\ufeff': '\ufeff'}
+
+# Normalizes the input for the tokenizer, in a single pass.
+# If diagnostics is a list and the input contains null characters, appends a Diagnostic for them
+# with kind 'nul'. line is the number of the first line of the input.
+def clean(unicodeString, diagnostics=None, line=1):
+    nuls = 0
+    def rewrite(match):
+        nonlocal nuls
+        found = match.group()
+        if found == '\x00':
+            nuls += 1
+        elif found == '\ufeff' and match.start() == 0:
+            return ''
+        return cleanings[found]
+    ret_value = clean_re.sub(rewrite, unicodeString)
+    if nuls and diagnostics is not None:
+        offset = ret_value.find('\x00')
+        errline, column = SourceText(ret_value, line).position(offset)
+        diagnostics.append(Diagnostic(offset, errline, column, f"{nuls} null character(s)", 'nul'))
     return ret_value
 
+# Binary token stream format (.usfmtok), for handing tokens from one step to the next without parsing again.
+#   magic         8 bytes, tokfile_magic
+#   header        4 little endian uint32s: format version, number of markers, number of tokens,
+#                 and size of the string table in bytes
+#   markers       the token types that occur, utf-8, each followed by a null byte
+#   marker codes  a little endian uint16 per token, the index of the token's type in the marker list
+#   offsets       a little endian uint32 per token, the end of the token's value in the string table, in characters
+#   string table  the values of all the tokens, concatenated, utf-8
+# Each value starts where the previous one ends.
+tokfile_magic = b'USFMTOK\x00'
+tokfile_version = 1
+tokfile_header = struct.Struct('<4I')
+
+# Returns the .usfmtok serialization of a sequence of tokens, as bytes.
+def dumpTokens(tokens):
+    markers = {}
+    codes = array.array('H')
+    offsets = array.array('I')
+    values = []
+    end = 0
+    for token in tokens:
+        codes.append(markers.setdefault(token.type, len(markers)))
+        value = token.value or ''
+        values.append(value)
+        end += len(value)
+        offsets.append(end)
+    if sys.byteorder == 'big':
+        codes.byteswap()
+        offsets.byteswap()
+    table = ''.join(values).encode('utf-8')
+    return b''.join([tokfile_magic,
+                     tokfile_header.pack(tokfile_version, len(markers), len(codes), len(table)),
+                     b''.join(marker.encode('utf-8') + b'\x00' for marker in markers),
+                     codes.tobytes(), offsets.tobytes(), table])
+
+# Returns the list of tokens serialized in data by dumpTokens().
+# Raises ValueError if data is not in .usfmtok format.
+def loadTokens(data):
+    if data[:len(tokfile_magic)] != tokfile_magic:
+        raise ValueError("Not a usfmtok token stream")
+    version, nmarkers, ntokens, tablesize = tokfile_header.unpack_from(data, len(tokfile_magic))
+    if version != tokfile_version:
+        raise ValueError(f"Unsupported usfmtok version: {version}")
+    pos = len(tokfile_magic) + tokfile_header.size
+    entries = []
+    for i in range(nmarkers):
+        end = data.index(b'\x00', pos)
+        marker = data[pos:end].decode('utf-8')
+        if marker not in tokenClasses:
+            raise ValueError(f"Unknown token type in usfmtok stream: {marker}")
+        entries.append(tokenClasses[marker])
+        pos = end + 1
+    codes = array.array('H', data[pos:pos + 2*ntokens])
+    pos += 2*ntokens
+    offsets = array.array('I', data[pos:pos + 4*ntokens])
+    pos += 4*ntokens
+    if sys.byteorder == 'big':
+        codes.byteswap()
+        offsets.byteswap()
+    table = data[pos:pos + tablesize].decode('utf-8')
+    if len(codes) != ntokens or len(offsets) != ntokens or (ntokens and offsets[-1] != len(table)):
+        raise ValueError("Truncated usfmtok token stream")
+    tokens = []
+    append = tokens.append
+    new = object.__new__     # skips UsfmToken.__init__, the fields are set here
+    start = 0
+    for code, end in zip(codes, offsets):
+        uclass, key = entries[code]
+        token = new(uclass)
+        token.type = key
+        token.value = table[start:end]
+        append(token)
+        start = end
+    return tokens
+
+# Writes tokens to a .usfmtok file.
+def writeTokenFile(tokens, path):
+    with open(path, "wb") as output:
+        output.write(dumpTokens(tokens))
+
+# Reads the tokens from a .usfmtok file.
+def readTokenFile(path):
+    with open(path, "rb") as input:
+        return loadTokens(input.read())
+
+# Constructs the UsfmToken for one token group.
+# The token class is looked up in the tokenClasses table, built from options at import.
+# A group with no class of its own (\toc) becomes an UnknownToken, like any other unrecognized marker.
+# The token's type is the marker string from the table, so all tokens of one type share a single string.
 def createToken(t):
-    global options
-    for k, uclass in options.items():
-        if t[0] == k:
-            if len(t) == 1:
-                token = uclass()
-            else:
-                token = uclass(t[1])
-            token.type = k
-            return token
-    raise Exception(t[0])
-
+    entry = tokenClasses.get(t[0])
+    if entry is None:
+        token = UnknownToken(t[0])
+        token.type = 'unknown'
+        return token
+    uclass, key = entry
+    token = new(uclass)     # skips UsfmToken.__new__ and __init__, uclass is a plain class
+    token.type = key
+    token.value = t[1] if len(t) > 1 else ''
+    return token
+
+new = object.__new__
+
+
+# Constructs a token that refers to its value in source instead of holding a copy, from a span yielded by scanSpans().
+def createOffsetToken(span, source):
+    name, pos, start, end = span
+    entry = offsetClasses.get(name)
+    if entry is None:
+        return offsetClasses['unknown'][0]('unknown', source, pos, pos + 1, pos + 1 + len(name))
+    uclass, key = entry
+    return uclass(key, source, pos, start, end)
+
+# The cleaned text that offset tokens refer to, with an index of its line starts.
+# Line numbers match the original input because clean() does not add or remove newlines.
+# Columns count characters in the cleaned text, where tabs have been expanded.
+class SourceText:
+    def __init__(self, text, line=1):
+        self.text = text
+        self.line = line    # number of the first line of text
+        self.linestarts = [0] + [m.end() for m in re.finditer('\n', text)]
+
+    def __repr__(self):
+        return f'SourceText({self.text[:20]!r}..., line={self.line})'
+
+    # Returns the 1-based (line, column) of the character at offset.
+    def position(self, offset):
+        i = bisect.bisect_right(self.linestarts, offset) - 1
+        return (self.line + i, offset - self.linestarts[i] + 1)
+
+# Mixin for tokens made with offsets=True. See offsetClasses.
+# Such a token holds its SourceText, the offset of the token (pos), and the offsets of its value (start, end).
+# It has no value slot. The value is sliced from the source text when it is read.
+# noinspection PyUnresolvedReferences
+class OffsetToken:
+    __slots__ = ()
+
+    def __init__(self, type, source, pos, start, end):
+        self.type = type
+        self.source = source
+        self.pos = pos
+        self.start = start
+        self.end = end
+
+    @property
+    def value(self):
+        return self.source.text[self.start:self.end]
+
+    # Assigning a value replaces the source text, so the token no longer has a position in the input.
+    @value.setter
+    def value(self, value):
+        self.source = SourceText(value)
+        self.pos = self.start = 0
+        self.end = len(value)
+
+    # Returns the 1-based (line, column) where the token starts.
+    def position(self):
+        return self.source.position(self.pos)
+
+# Metaclass for the token classes.
+# Gives every token class empty __slots__, so that a token holds just its type and value, with no __dict__.
+# The value slot is in the plain subclass of each token class. See plainClasses.
+# Numbers the classes as they are defined. The number is the class's kind code, a small int that
+# identifies the token class the same way the isXXX() methods do. Consumers may switch on token.kind
+# instead of testing the isXXX() methods in turn. The kinds table below maps each marker to its kind code.
+class TokenClass(type):
+    count = 0
+    def __new__(metacls, name, bases, namespace):
+        namespace.setdefault('__slots__', ())
+        if 'kind' not in namespace:
+            namespace['kind'] = TokenClass.count
+            TokenClass.count += 1
+        return super().__new__(metacls, name, bases, namespace)
 
 # noinspection PyMethodMayBeStatic
-class UsfmToken:
+class UsfmToken(metaclass=TokenClass):
+    __slots__ = ('type',)
+
+    # Calling a token class makes an instance of its plain subclass, which has the value slot.
+    def __new__(cls, *args):
+        return new(plainClasses.get(cls, cls))
+
     def __init__(self, value=''):
         self.value = value
         self.type = None
@@ -584,8 +788,7 @@ class UnknownToken(UsfmToken):
 
 class EscapedToken(UsfmToken):
     def renderOn(self, printer):
-        self.value = '\\'
-        return printer.renderText(self)
+        return printer.renderEscaped(self)
     def isUnknown(self): return True
 
 class IDToken(UsfmToken):
@@ -1322,6 +1525,7 @@ class PMRToken(UsfmToken):
     def renderOn(self, printer):  return printer.render_pmr(self)
     def is_pmr(self):              return True
 
+# Maps each marker (and 'text', 'unknown') to its token class. createToken() does one lookup per token.
 options = {
     # Listing the most common tags first
     'v':    VToken,
@@ -1482,3 +1686,36 @@ options = {
     'pmr':  PMRToken,
     'unknown': UnknownToken
 }
+
+# Returns a map from each token class to its plain subclass, the class of the tokens that hold their own value.
+# Offset tokens derive from the token classes too, but have no value slot. See offsetClasses.
+# A plain class has the name and kind of its token class, and is its attribute plain, so that its tokens can be pickled.
+def plainTokenClasses():
+    plain = {}
+    for uclass in set(options.values()) | {UsfmToken}:
+        uclass.plain = plain[uclass] = TokenClass(uclass.__name__, (uclass,),
+                                                  {'__slots__': ('value',), 'kind': uclass.kind,
+                                                   '__qualname__': uclass.__qualname__ + '.plain'})
+    return plain
+
+plainClasses = plainTokenClasses()
+
+# Maps each marker to its plain token class and to the interned marker string, for createToken().
+tokenClasses = {sys.intern(k): (plainClasses[uclass], sys.intern(k)) for k, uclass in options.items()}
+
+# Returns a map from each marker to the offset token class and the interned marker string, for createOffsetToken().
+# Each offset token class derives from the corresponding token class, and has the same name and kind.
+def offsetTokenClasses():
+    offset = {}
+    for uclass in set(options.values()):
+        offset[uclass.plain] = TokenClass(uclass.__name__, (OffsetToken, uclass),
+                                          {'__slots__': ('source', 'pos', 'start', 'end'), 'kind': uclass.kind})
+    return {k: (offset[uclass], key) for k, (uclass, key) in tokenClasses.items()}
+
+offsetClasses = offsetTokenClasses()
+
+# Maps each marker to the kind code of its token class.
+kinds = {k: uclass.kind for k, uclass in options.items()}
+
+if os.environ.get('USFM_PARSE_CACHE'):
+    setCache(os.environ['USFM_PARSE_CACHE'])
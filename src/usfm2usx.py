@@ -382,11 +382,9 @@ def convertFile(usfmpath, bookId):
 
         reportProgress("CONVERTING " + usfmpath)
         # sys.stdout.flush()
-        input = io.open(usfmpath, "tr", encoding="utf-8-sig")
-        str = input.read()
-        input.close()
-        for token in parseUsfm.parseString(str):
-            take(token)
+        with io.open(usfmpath, "tr", encoding="utf-8-sig") as input:
+            for token in parseUsfm.iterTokens(input):
+                take(token)
         closeUsx()
         copy(os.path.join(en_book_dir, 'LICENSE.md'), target_book_dir)
         createManifest(en_book_dir, target_book_dir)
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+# Implements usfmPrinter object to turn a sequence of parseUsfm tokens back into usfm text.
+# The printer implements the render protocol of the token classes: token.renderOn(printer) calls
+# printer.renderXXX(token) for each type of token.
+# The text is collected in a list of strings, which is joined once by getvalue().
+#
+# Parsing the printed text yields the same tokens again. White space is only placed between tokens
+# where the parser skips it, and is always placed where the parser needs it to end the previous token.
+# The one exception is \toc, which the parser turns into an unknown token, dropping its value.
+# Empty text tokens, which the parser does not make, are not printed.
+# By default, markers start on a new line, except for footnote, cross reference and character style markers.
+# The caller can specify a different set of markers that do not start on a new line, by calling setInlineTags().
+
+import parseUsfm
+
+# Character style markers, and the parts of footnotes and cross references.
+default_inline_tags = {m[:-1] for m in parseUsfm.endMarkers} | {m for m in parseUsfm.endMarkers} | \
+                      {"fr", "fk", "fq", "fqa", "ft", "fv", "fdc", "fp", "xo", "xq", "xt", "+xt"}
+
+# What may separate the previous token from the next one, depending on the previous token:
+# (before a marker that starts a line, before an inline marker, before text, unknown marker value or None)
+# The separator before a marker that starts a line is also written at the end of the text.
+NEED_WHITE = ('\n', ' ', ' ', None)       # after a marker, which white space must end
+NEED_LINE = ('\n', '', '\n', None)        # after text or a value, where a space would become part of the value
+NEED_LINE_CR = ('\r\n', '', '\r\n', None) # the same, after a lone carriage return, which must not be joined with \n
+NEED_ANY = ('\n', '', ' ', None)          # after a closing marker
+NEED_GLUE = ('', '', '', None)            # nothing at all
+
+# Returns whether the scanner recognizes a marker at the start of s.
+# An unknown marker may be a start marker that was not followed by the white space or number it needs.
+def recognized(s):
+    return next(parseUsfm.scanSpans(s))[0] != 'unknown'
+
+# Characters before which no space is added after a closing marker.
+nospace_before = '.?!;:,)’”»›'
+
+class usfmPrinter:
+    def __init__(self):
+        self._parts = []
+        self._need = NEED_GLUE      # nothing comes before the first token
+        self._inline_tags = default_inline_tags
+        self._markers = {}
+
+    # Specify a set of usfm tags that do not have to start on a new line
+    # See default_inline_tags for the defaults.
+    def setInlineTags(self, tags):
+        self._inline_tags = tags
+        self._markers = {}
+
+    # Renders each of the tokens. Returns self.
+    def printTokens(self, tokens):
+        for token in tokens:
+            token.renderOn(self)
+        return self
+
+    # Returns the usfm text printed so far, ending with a line break where that does not change the tokens.
+    def getvalue(self):
+        return ''.join(self._parts) + self._need[0]
+
+    def renderText(self, token):
+        value = token.value
+        if not value:
+            return      # the parser makes no empty text tokens
+        need = self._need
+        if need is NEED_ANY and value[0] in nospace_before:
+            self._parts.append(value)
+        elif not self._parts and value[0] == '\ufeff':
+            self._parts.append('\n' + value)     # the parser would drop a byte order mark at the very start
+        else:
+            self._parts.append(need[2] + value)
+        if need[3] is not None and recognized(f"\\{need[3]} {value}\n"):
+            self._need = NEED_GLUE      # a chapter or verse number, which white space would complete
+        else:
+            self._need = NEED_LINE_CR if value[-1] == '\r' else NEED_LINE
+
+    def renderEscaped(self, token):
+        self._parts.append(self._need[1] + '\\')
+        self._need = NEED_WHITE
+
+    def renderUnknown(self, token):
+        value = token.value
+        self._parts.append(f"{self._need[0]}\\{value}")
+        if recognized(f"\\{value}\n"):
+            self._need = ('', '', ' ', value)
+        else:
+            self._need = ('\r\n' if value[-1] == '\r' else '\n', '', ' ', value)
+
+    def renderMarker(self, token):
+        type = token.type
+        entry = self._markers.get(type)
+        if entry is None:
+            entry = self._markers[type] = self._markerEntry(type)
+        index, tag, valueNeed, need = entry
+        value = token.value
+        if value:
+            self._parts.append(f"{self._need[index]}{tag} {value}")
+            self._need = valueNeed if value[-1] != '\r' else NEED_LINE_CR
+        else:
+            self._parts.append(self._need[index] + tag)
+            self._need = need
+
+    # Returns the separator index, the marker as written, and what must follow it with and without a value.
+    def _markerEntry(self, type):
+        index = 1 if type in self._inline_tags else 0
+        if type[-1] == '*':
+            return (index, '\\' + type, NEED_ANY, NEED_ANY)
+        valueNeed = NEED_LINE if parseUsfm.startForms.get(type) == parseUsfm.FORM_VALUE else NEED_WHITE
+        return (index, '\\' + type, valueNeed, NEED_WHITE)
+
+# Every other renderXXX() method called by the token classes renders a marker.
+class _RenderNames:
+    def __init__(self):
+        self.names = set()
+    def __getattr__(self, name):
+        self.names.add(name)
+        return lambda token: None
+
+def _addRenderMarkers():
+    names = _RenderNames()
+    for uclass in set(parseUsfm.options.values()):
+        uclass().renderOn(names)
+    for name in names.names:
+        if not hasattr(usfmPrinter, name):
+            setattr(usfmPrinter, name, usfmPrinter.renderMarker)
+
+_addRenderMarkers()
+
+# Returns the usfm text for a sequence of tokens.
+def printTokens(tokens):
+    return usfmPrinter().printTokens(tokens).getvalue()
@@ -5,23 +5,83 @@
 #    by calling setInlineTags() to specify a different set of usfm tags that should not start on a new line
 #    by including line breaks in arguments to writeStr()
 #    by calling newline() to insert extra line breaks
+#
+# The usfm text goes to one of:
+#    usfmWriter(path)               the file at path, written through a buffer of the given size
+#    usfmWriter()                   memory; call getvalue() to get the text
+#    usfmWriter(sink=sink)          sink, which is a list of strings, or any object with a write(str) method
+#    usfmWriter(path, atomic=True)  memory, and close() commits the text to path
+# commit() replaces a file only if its content changes, so an unchanged file keeps its time stamp.
 
 import io
+import os
 
 class usfmWriter:
-    def __init__(self, path):
+    def __init__(self, path=None, sink=None, buffering=65536, atomic=False):
         self._path = path
-        self._file = io.open(path, "tw", encoding='utf-8', newline='\n')
+        self._atomic = atomic
+        self._parts = None
+        self._file = None
+        self._sink = sink
+        if sink is None and path and not atomic:
+            self._file = io.open(path, "tw", buffering, encoding='utf-8', newline='\n')
+            self._write = self._file.write
+        elif sink is None:
+            self._parts = []
+            self._write = self._parts.append
+        elif isinstance(sink, list):
+            self._write = sink.append
+        else:
+            self._write = sink.write
         self._spaced = True
         self._newlined = True
         self._inline_tags = {"f", "ft", "f*", "rq", "rq*", "fe", "fe*", "fr", "fk", "fq", "fqa", "fqa*"}
 
+    # Ends the text with a line break. Closes the file, or commits the text to path if atomic was specified.
+    # Returns True if a file was written.
     def close(self):
-        if self._file:
+        if self._write:
             if not self._newlined:
-                self._file.write("\n")
-            self._file.close()
-            self._file = None
+                self._write("\n")
+            self._write = None
+            if self._file:
+                self._file.close()
+                self._file = None
+                return True
+            if self._atomic:
+                return self.commit(self._path)
+        return False
+
+    # Returns the text written so far, unless it went to a file or to a sink that cannot return it.
+    def getvalue(self):
+        if self._parts is not None:
+            return ''.join(self._parts)
+        if isinstance(self._sink, list):
+            return ''.join(self._sink)
+        if hasattr(self._sink, "getvalue"):
+            return self._sink.getvalue()
+        raise ValueError("usfmWriter text was not kept in memory")
+
+    # Writes the text to the file at path, by way of path + ".new",
+    # so that the file is either replaced entirely or not at all.
+    # Leaves the file alone if it already has the same content.
+    # Returns True if the file was written.
+    def commit(self, path):
+        data = self.getvalue().encode('utf-8')
+        if os.path.isfile(path) and os.path.getsize(path) == len(data):
+            with io.open(path, "rb") as input:
+                if input.read() == data:
+                    return False
+        tmppath = path + ".new"
+        try:
+            with io.open(tmppath, "wb") as output:
+                output.write(data)
+            os.replace(tmppath, path)
+        except BaseException:
+            if os.path.exists(tmppath):
+                os.remove(tmppath)
+            raise
+        return True
 
     # Specify a set of usfm tags that do not have to start on a new line
     # See __init__() for the defaults.
@@ -39,7 +99,7 @@ class usfmWriter:
             # Indonesian TBI version of this condition:
             # elif not self._spaced and s[0] not in '.?!;:,)’»›\n ':
                 s = " " + s
-            self._file.write(s)
+            self._write(s)
             self._spaced = (s[-1] == ' ')
             self._newlined = (s[-1] == '\n')
 
@@ -49,7 +109,7 @@ class usfmWriter:
             intro = "\\" if (self._newlined or self._spaced) else " \\"
         else:
             intro = "\\" if self._newlined else "\n\\"
-        self._file.write(f"{intro}{key}")
+        self._write(f"{intro}{key}")
         self._spaced = False
         self._newlined = False
         if value:
@@ -60,6 +120,6 @@ class usfmWriter:
     # Inserts the specified number of line breaks (defualt 1) into the file.
     def newline(self, n=1):
         for i in range(n):
-            self._file.write("\n")
+            self._write("\n")
         self._spaced = True
         self._newlined = True
@@ -446,17 +446,26 @@ def take(token, usfm):
 
 # Parses and rewrites the usfm file with corrections to capitalization
 # and/or chapter titles.
+# A file that does not parse cleanly is reported and left as it is.
+# Null characters do not stop the parse, so they do not count.
 # Returns True if any changes are made.
 def convert_by_token(path):
     changes = 0
     with io.open(path, "tr", 1, encoding="utf-8-sig") as input:
         str = input.read(-1)
 
-    usfm = usfmWriter.usfmWriter(path)
+    diagnostics = []
+    tokens = parseUsfm.parseString(str, diagnostics=diagnostics)
+    diagnostics = [d for d in diagnostics if d.kind != 'nul']
+    if diagnostics:
+        for d in diagnostics:
+            reportError(f"Unparsable usfm in {shortname(path)}, {d}")
+        return False
+
+    usfm = usfmWriter.usfmWriter(path, atomic=True)
     usfm.setInlineTags({"f", "ft", "f*", "rq", "rq*", "fe", "fe*", "fr", "fk", "fq", "fqa", "fqa*"})
     global needcaps
     needcaps = True
-    tokens = parseUsfm.parseString(str)
     for token in tokens:
         changes += take(token, usfm)
     usfm.close()
@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+# The pyparsing grammar for usfm, used by parseUsfm when the 'pyparsing' engine is selected.
+# parseUsfm imports this module on first use, so that programs that never select that engine
+# do not pay for importing pyparsing and building the grammar.
+
+from pyparsing import Word, OneOrMore, nums, Literal, White, Group, \
+        Suppress, NoMatch, Optional, CharsNotIn, MatchFirst
+
+
+# A usfm token not necessarily followed by anything
+def usfmToken(key):
+    return Group(Suppress(backslash) + Literal(key) + Suppress(White()))
+
+# Literal backslash
+def usfmBackslashToken(key):
+    return Group(Literal(key))
+
+# A terminating token, always ending with '*'
+def usfmEndToken(key):
+    return Group(Suppress(backslash) + Literal(key + '*'))
+
+# A token that is followed by a value on the same line
+def usfmTokenValue(key, value):
+    return Group(Suppress(backslash) + Literal(key) + Suppress(White()) + Optional(value))
+
+# Chapter or verse token
+def usfmTokenNumber(key):
+    return Group(Suppress(backslash) + Literal(key) + Suppress(White()) + Word(nums + '-') + Suppress(White()))
+
+
+# Define grammar
+# NOTE: We separate fields like \mt and \mt1, \s and \s1
+#           so that we could conceivably rewrite the file without changing the convention used
+#           even though it does increase the complexity a little.
+
+# phrase = Word(alphas + "-.,!? —–‘“”’;:()'\"[]/&%=*…{}" + nums)
+phrase    = CharsNotIn('\n\\')
+backslash = Literal('\\')
+plus      = Literal('+')
+
+textBlock = Group(Optional(NoMatch(), "text") + phrase)
+unknown   = Group(Optional(NoMatch(), "unknown") + Suppress(backslash) + CharsNotIn(' \n\t\\'))
+escape    = usfmTokenValue('\\', phrase)
+
+id      = usfmTokenValue("id", phrase)
+ide     = usfmTokenValue("ide", phrase)
+usfmV   = usfmTokenValue('usfm', phrase) # USFM version marker (new with USFM 3.0)
+h       = usfmTokenValue("h", phrase)
+
+mt      = usfmTokenValue("mt", phrase)
+mt1     = usfmTokenValue("mt1", phrase)
+mt2     = usfmTokenValue("mt2", phrase)
+mt3     = usfmTokenValue("mt3", phrase)
+mte     = usfmTokenValue("mte", phrase)
+
+ms      = usfmTokenValue('ms', phrase)
+ms1     = usfmTokenValue('ms1', phrase)
+ms2     = usfmTokenValue('ms2', phrase)
+mr      = usfmTokenValue('mr', phrase)
+
+s       = usfmTokenValue("s", phrase)
+s1      = usfmTokenValue("s1", phrase)
+s2      = usfmTokenValue("s2", phrase)
+s3      = usfmTokenValue("s3", phrase)
+s4      = usfmTokenValue("s4", phrase)
+s5      = usfmTokenValue("s5", phrase)
+
+sr      = usfmTokenValue("sr", phrase)
+sts     = usfmTokenValue("sts", phrase)
+r       = usfmTokenValue("r", phrase)
+p       = usfmToken("p")
+pc      = usfmToken("pc")
+pi      = usfmToken('pi')
+pi1     = usfmToken('pi1')
+pi2     = usfmToken('pi2')
+cls     = usfmToken('cls')
+
+b       = usfmToken("b")
+c       = usfmTokenNumber("c")
+ca_s     = usfmToken("ca")
+ca_e     = usfmEndToken("ca")
+cl      = usfmTokenValue("cl", phrase)
+cp      = usfmTokenValue("cp", phrase)
+v       = usfmTokenNumber('v')
+va_s     = usfmToken('va')
+va_e     = usfmEndToken('va')
+vp_s     = usfmToken('vp')
+vp_e     = usfmEndToken('vp')
+
+k_s     = usfmToken("k")
+k_e     = usfmEndToken("k")
+
+q       = usfmToken('q')
+q1      = usfmToken('q1')
+q2      = usfmToken('q2')
+q3      = usfmToken('q3')
+q4      = usfmToken('q4')
+
+qa      = usfmToken("qa")
+qac     = usfmToken("qac")
+qc      = usfmToken("qc")
+qm      = usfmToken("qm")
+qm1     = usfmToken("qm1")
+qm2     = usfmToken("qm2")
+qm3     = usfmToken("qm3")
+qr      = usfmToken("qr")
+qs_s    = usfmToken("qs")
+qs_e    = usfmEndToken("qs")
+qt_s    = usfmToken("qt")
+qt_e    = usfmEndToken("qt")
+nb      = usfmToken("nb")
+m       = usfmToken("m")
+
+# Footnotes
+f_s      = usfmTokenValue("f", plus)
+f_e      = usfmEndToken("f")
+fe_s     = usfmTokenValue("fe", plus)
+fe_e     = usfmEndToken("fe")
+fr      = usfmTokenValue("fr", phrase)
+fk      = usfmTokenValue("fk", phrase)
+ft      = usfmTokenValue("ft", phrase)
+fp      = usfmToken("fp")
+fq      = usfmTokenValue("fq", phrase)
+fqa     = usfmTokenValue("fqa", phrase)
+fqa_e    = usfmEndToken('fqa')
+fv      = usfmTokenValue('fv', phrase)
+fv_e     = usfmEndToken('fv')
+fdc     = usfmTokenValue('fdc', phrase)
+fdc_e    = usfmEndToken('fdc')
+
+# Cross References
+xs      = usfmTokenValue("x", plus)
+xe      = usfmEndToken("x")
+xdc_s    = usfmToken('xdc')
+xdc_e    = usfmEndToken('xdc')
+xo      = usfmTokenValue("xo", phrase)
+xq      = usfmTokenValue("xq", phrase)
+
+# NOTE: xt can occur outside of cross-references
+# Not sure if this is the best way to handle it? (RJH May 2019)
+xt      = usfmTokenValue('xt', phrase)
+xt_e    = usfmEndToken('xt')
+xtnested      = usfmTokenValue('+xt', phrase)
+xtnested_e    = usfmEndToken('+xt')
+
+wj_s     = usfmToken('wj')
+wj_e     = usfmEndToken('wj')
+
+# Transliterated
+tl_s      = usfmToken('tl')
+tl_e      = usfmEndToken('tl')
+
+# Small caps
+sc_s      = usfmToken('sc')
+sc_e      = usfmEndToken('sc')
+
+# Italics
+ist     = usfmToken("it")
+ien     = usfmEndToken("it")
+
+# Bold
+bd_s    = usfmToken('bd')
+bd_e    = usfmEndToken('bd')
+bdit_s  = usfmToken('bdit')
+bdit_e  = usfmEndToken('bdit')
+
+li      = usfmToken("li")
+li1     = usfmToken("li1")
+li2     = usfmToken("li2")
+li3     = usfmToken("li3")
+li4     = usfmToken("li4")
+
+d       = usfmTokenValue("d", phrase)
+sp      = usfmTokenValue("sp", phrase)
+add_s    = usfmToken('add')
+add_e    = usfmEndToken('add')
+nd_s     = usfmToken('nd')
+nd_e     = usfmEndToken('nd')
+pn_s    = usfmToken("pn")
+pn_e    = usfmEndToken("pn")
+rq_s     = usfmTokenValue('rq', phrase)
+rq_e     = usfmEndToken('rq')
+w_s     = usfmToken('w')
+w_e     = usfmEndToken('w')
+pbr     = usfmBackslashToken('\\\\')
+mi      = usfmToken('mi')
+
+# Comments
+rem     = usfmTokenValue("rem", phrase)
+
+# Tables
+tr      = usfmToken("tr")
+th1     = usfmToken("th1")
+th2     = usfmToken("th2")
+th3     = usfmToken("th3")
+th4     = usfmToken("th4")
+th5     = usfmToken("th5")
+th6     = usfmToken("th6")
+thr1    = usfmToken("thr1")
+thr2    = usfmToken("thr2")
+thr3    = usfmToken("thr3")
+thr4    = usfmToken("thr4")
+thr5    = usfmToken("thr5")
+thr6    = usfmToken("thr6")
+tc1     = usfmToken("tc1")
+tc2     = usfmToken("tc2")
+tc3     = usfmToken("tc3")
+tc4     = usfmToken("tc4")
+tc5     = usfmToken("tc5")
+tc6     = usfmToken("tc6")
+tcr1    = usfmToken("tcr1")
+tcr2    = usfmToken("tcr2")
+tcr3    = usfmToken("tcr3")
+tcr4    = usfmToken("tcr4")
+tcr5    = usfmToken("tcr5")
+tcr6    = usfmToken("tcr6")
+
+# Table of Contents
+toc     = usfmTokenValue("toc", phrase)
+toc1    = usfmTokenValue("toc1", phrase)
+toc2    = usfmTokenValue("toc2", phrase)
+toc3    = usfmTokenValue("toc3", phrase)
+
+# Introductory Materials
+is0     = usfmTokenValue('is', phrase) # 'is' is a Python keyword so can't be used here
+is1     = usfmTokenValue('is1', phrase)
+is2     = usfmTokenValue('is2', phrase)
+is3     = usfmTokenValue('is3', phrase)
+
+ip      = usfmToken('ip')
+ipi     = usfmToken('ipi')
+im      = usfmToken('im')
+imi     = usfmToken('imi')
+iot     = usfmToken("iot")
+io1     = usfmToken("io1") | usfmToken("io")
+io2     = usfmToken("io2")
+ior_s   = usfmToken("ior")
+ior_e   = usfmEndToken("ior")
+
+imt     = usfmTokenValue('imt', phrase)
+imt1    = usfmTokenValue('imt1', phrase)
+imt2    = usfmTokenValue('imt2', phrase)
+imt3    = usfmTokenValue('imt3', phrase)
+ie      = usfmToken('ie')
+
+# Quoted book title
+bk_s    = usfmToken("bk")
+bk_e    = usfmEndToken("bk")
+# Key term
+k_s     = usfmToken("k")
+k_e     = usfmEndToken("k")
+# Peripherals
+periph = usfmTokenValue("periph", phrase)
+
+# Other paragraph types
+pm = usfmToken("pm")
+pmo = usfmToken("pmo")
+pmc = usfmToken("pmc")
+pmr = usfmToken("pmr")
+
+element =  MatchFirst([ide, id,
+                       usfmV, h,
+                       toc, toc1, toc2, toc3,
+                       mt, mt1, mt2, mt3,
+                       mte,
+                       ms, ms1, ms2,
+                       imt, imt1, imt2, imt3,
+                       ie,
+                       mr,
+                       s, s1, s2, s3, s4, s5,
+                       sr,
+                       sts,
+                       r,
+                       p,
+                       pc,
+                       pi, pi1, pi2,
+                       cls,
+                       mi,
+                       b,
+                       ca_s, ca_e,
+                       c,
+                       cl, cp,
+                       va_s, va_e, vp_s, vp_e,
+                       v,
+                       wj_s, wj_e,
+                       nd_s, nd_e,
+                       q, q1, q2, q3, q4,
+                       qa,
+                       qac,
+                       qc,
+                       qm, qm1, qm2, qm3,
+                       qr,
+                       qs_s, qs_e,
+                       qt_s, qt_e,
+                       nb,
+                       m,
+                       f_s, f_e,
+                       fe_s, fe_e,
+                       fr,
+                       fk,
+                       ft,
+                       fq,
+                       fqa, fqa_e,
+                       fp,
+                       fv, fv_e,
+                       fdc, fdc_e,
+                       xs, xe,
+                       xdc_s, xdc_e,
+                       xo,
+                       xq,
+                       xt, xt_e, xtnested, xtnested_e,
+                       ist,
+                       ien,
+                       wj_s, wj_e,
+                       bd_s, bd_e,
+                       bdit_s, bdit_e,
+                       li, li1, li2, li3, li4,
+                       d,
+                       sp,
+                       add_s, add_e,
+                       pn_s, pn_e,
+                       rq_s, rq_e,
+                       w_s, w_e,
+                       tl_s, tl_e,
+                       is0, is1, is2, is3,
+                       ip, ipi,
+                       im,
+                       imi,
+                       iot, io1, io2,
+                       ior_s, ior_e,
+                       k_s, k_e,
+                       bk_s, bk_e,
+                       sc_s, sc_e,
+                       pbr,
+                       rem,
+                       tr,
+                       th1, th2, th3, th4, th5, th6,
+                       thr1, thr2, thr3, thr4, thr5, thr6,
+                       tc1, tc2, tc3, tc4, tc5, tc6,
+                       tcr1, tcr2, tcr3, tcr4, tcr5, tcr6,
+                       textBlock,
+                       escape,
+                       periph,
+                       pm, pmo, pmc, pmr,
+                       unknown])
+
+usfm    = OneOrMore(element)
@@ -6,6 +6,7 @@
 #       This is an unfortunate name, because source_dir contains the translated text, not the source text.
 #   compare_dir - location of files containing the source text,
 #       against which the translated text may be compared.
+#       An index of the source text is kept in compare_dir/.verifyUSFM-index, and rebuilt when a source file changes.
 #   filename  (optional, checks all files if omitted)
 #   standard_chapter_title (optional)
 #   suppress[1]  - Suppress all warnings about numbers. (possible verse number in verse, space in number, number prefix/suffix, etc.)
@@ -20,6 +21,12 @@
 #   suppress[10] - Suppress "First word not capitalized" warnings; report totals only
 #   suppress[11] - Suppress "Punctuation missing at end of paragraph" warnings; report totals only'
 #   suppress[12] - Suppress warnings about Mixed-case words.
+#   suppress_modes declares whether each of flags 1-11 turns its checks off or reduces them to totals.
+#   workers - number of processes that verify files in parallel (default 1)
+#   cache - keep the results for each file in source_dir/.verifyUSFM-cache, and only verify files that changed (default False)
+#   issues_jsonl - also write the issues to source_dir/issues.jsonl, one JSON record per issue (default False)
+#   profile - time the parser, the checks and the I/O, and print a ranked table of the times (default "", no profiling)
+#       "table" prints just the table. "json" or "pstats" also writes a profile of each file in source_dir/.verifyUSFM-profile
 # Detects whether files are aligned USFM.
 
 config = None
@@ -28,18 +35,25 @@ std_titles = None
 state = None
 gui = None
 listener = None
+sink = None         # IssueSink that the issues go to, if main() is running
 
 lastToken = None
 aligned_usfm = False
 usfm_version = 2
 issuesFile = None
+recorder = None     # list of report calls (function name, arguments...), when verifying in a worker process
 issues: dict = {}   # Can't put in State because we want to accumulate issues across all files.
 wordlist = dict()
 
 import configmanager
+import hashlib
+import json
 import os
+import pickle
 from pathlib import Path
 import sys
+import threading
+import time
 import parseUsfm
 import io
 import footnoted_verses
@@ -51,6 +65,10 @@ import sentences
 import section_titles
 from datetime import date
 
+# Held while the module globals are in use, by main(), verifyDir(), verifyFiles(), verifyFile(), verifyContents()
+# and the Verifier methods, so that they take turns. It is reentrant, so that a listener may use a Verifier.
+verifier_lock = threading.RLock()
+
 # Item categories
 PP = 1      # paragraph or quote
 QQ = 2      # poetry
@@ -66,7 +84,7 @@ class State:
         self.ID = ""
         self.reference = ""
         self.errorRefs = set()
-        self.sourcetext = {}
+        self.sourcetext = {}      # the text of each verse while scanning source text, else the index of it
         self.canContinue = True
         self.initBook()
 
@@ -290,9 +308,9 @@ class State:
     # Simply appends the text to the sourcetext for the current verse
     def addSourceText(self, t):
         if self.reference in self.sourcetext:
-            state.sourcetext[state.reference] += " " + t
+            self.sourcetext[self.reference] += " " + t
         else:
-            state.sourcetext[state.reference] = t
+            self.sourcetext[self.reference] = t
 
     # Adds the specified reference to the set of error references
     # Returns True if reference can be added
@@ -393,14 +411,25 @@ def long_substring(s1, s2):
 
 # Writes error message to stderr and to issues.txt.
 # Keeps track of how many errors of each type.
-def reportError(msg, errorId=0, summarize_only=False):
-    if not summarize_only:
+# reference is where the error was found, by default the current reference.
+def reportError(msg, errorId=0, summarize_only=False, reference=None):
+    if reference is None:
+        reference = state.reference if state else ""
+    if recorder is not None:
+        recorder.append(('reportError', msg, errorId, summarize_only, reference))
+        return
+    if sink:
+        sink.add(msg, errorId, summarize_only, reference)
+    elif not summarize_only:
         reportToGui('<<ScriptMessage>>', msg)
         write(msg, sys.stderr)
         openIssuesFile().write(msg + "\n")
     if listener:
         listener.error(msg, errorId)
+    countIssue(msg, errorId, summarize_only)
 
+# Adds the error to the summary of issues, if it has an errorId.
+def countIssue(msg, errorId, summarize_only):
     if errorId > 0:
         global issues
         if errorId in issues:
@@ -413,6 +442,11 @@ def reportError(msg, errorId=0, summarize_only=False):
 
 # Sends a progress message to the GUI, and to stdout.
 def reportProgress(msg):
+    if recorder is not None:
+        recorder.append(('reportProgress', msg))
+        return
+    if sink:
+        sink.flush()
     reportToGui('<<ScriptProgress>>', msg)
     write(msg, sys.stdout)
     if listener:
@@ -420,6 +454,11 @@ def reportProgress(msg):
 
 # Sends a status message to the GUI, and to stdout.
 def reportStatus(msg):
+    if recorder is not None:
+        recorder.append(('reportStatus', msg))
+        return
+    if sink:
+        sink.flush()
     reportToGui('<<ScriptMessage>>', msg)
     write(msg, sys.stdout)
 
@@ -429,6 +468,53 @@ def reportToGui(event, msg):
             gui.progress = msg if not gui.progress else f"{gui.progress}\n{msg}"
         gui.event_generate(event, when="tail")
 
+# Collects the issues reported by reportError(), and passes them on in batches: to the GUI, stderr and issues.txt,
+# and to issues.jsonl if jsonpath is specified, as one JSON record per issue, including those not reported individually.
+# A batch is passed on when it holds batchsize issues, or when an issue comes interval seconds after the previous batch,
+# and before any progress or status message, so the messages still appear in the order they were reported.
+class IssueSink:
+    def __init__(self, jsonpath=None, interval=0.25, batchsize=500):
+        self.records = []
+        self.jsonfile = io.open(jsonpath, "tw", encoding='utf-8', newline='\n') if jsonpath else None
+        self.interval = interval
+        self.batchsize = batchsize
+        self.flushed = time.monotonic()
+
+    def add(self, msg, errorId, summarize_only, reference):
+        self.records.append((msg, errorId, summarize_only, reference))
+        if len(self.records) >= self.batchsize or time.monotonic() - self.flushed >= self.interval:
+            self.flush()
+
+    def flush(self):
+        self.flushed = time.monotonic()
+        if not self.records:
+            return
+        records = self.records
+        self.records = []
+        reported = [record for record in records if not record[2]]
+        if reported:
+            text = "\n".join(record[0] for record in reported)
+            reportToGui('<<ScriptMessage>>', text)
+            try:
+                sys.stderr.write(text + "\n")
+            except UnicodeEncodeError:
+                for msg, errorId, summarized, reference in reported:
+                    try:
+                        sys.stderr.write(msg + "\n")
+                    except UnicodeEncodeError:
+                        sys.stderr.write(reference + ": (Unicode...)\n")
+            openIssuesFile().write(text + "\n")
+        if self.jsonfile:
+            self.jsonfile.writelines(json.dumps({'id': errorId, 'reference': reference, 'message': msg,
+                                                 'summarized': summarized}, ensure_ascii=False) + "\n"
+                                     for msg, errorId, summarized, reference in records)
+
+    def close(self):
+        self.flush()
+        if self.jsonfile:
+            self.jsonfile.close()
+            self.jsonfile = None
+
 # This little function streams the specified message and handles UnicodeEncodeError
 # exceptions, which are common in Indian language texts. 2/5/24.
 def write(msg, stream):
@@ -509,51 +595,103 @@ def wordkey(item):
 
 # Handles the next token in the source text.
 # Only cares about storing text, as of the date of this comment (Apr-2024)
-def scan(token):
+def scan(token, source):
     if token.isTEXT():
-        state.addSourceText(token.value)
+        source.addSourceText(token.value)
     elif token.isV():
         vs = token.value.split('-')
-        state.addVerse(vs[-1])
+        source.addVerse(vs[-1])
     elif token.isC():
-        state.addChapter(token.value)
+        source.addChapter(token.value)
     elif token.isID():
-        state.addID(token.value[0:3].upper(), scan=True)
+        source.addID(token.value[0:3].upper(), scan=True)
     elif isFootnote(token):
-        state.addSourceText(token.value)
-
-# Parses the source text into a Python data structure.
-def scanSourceFile(path):
-    state.initBook()
-    with io.open(path, "tr", encoding="utf-8-sig") as input:
-        str = input.read(-1)
-    tokens = parseUsfm.parseString(str)
-    for token in tokens:
-        scan(token)
-
-# Loads the source text for the current book if compare_dir is set.
-# Slow operation, it parses a usfm file and stores verse text in a dict.
+        source.addSourceText(token.value)
+
+# Parses usfm text the way the source text is parsed. Returns a dict of reference -> verse text.
+def scanVerses(contents):
+    source = State()
+    for token in parseUsfm.iterTokens(contents):
+        scan(token, source)
+    return source.sourcetext
+
+# Parses the source text, and returns the index of its verses.
+# For each verse reference, the index holds the set of words in the source verse, and the subset of them that
+# count as words in common with the translation: words of length > 2 in lower case.
+def indexSource(contents):
+    index = {}
+    for reference, text in scanVerses(contents).items():
+        words = frozenset(text.split())
+        index[reference] = (words, frozenset(w for w in words if len(w) > 2 and w.islower()))
+    return index
+
+sourceindex_version = 1     # increment when indexSource() changes
+source_indexes = dict()     # source path -> (digest, index), for the source files loaded by this process
+
+# Returns the index of a source file, which is built once and kept in compare_dir/.verifyUSFM-index,
+# so that it is reused by later runs, and by every project that is compared with the same source text.
+# The saved index is rebuilt when the source file changes. If it can't be saved, it is kept in memory only.
+def sourceIndex(sourcepath):
+    with io.open(sourcepath, "rb") as input:
+        data = input.read()
+    digest = hashlib.blake2b(data, digest_size=20).hexdigest()
+    if sourcepath in source_indexes and source_indexes[sourcepath][0] == digest:
+        return source_indexes[sourcepath][1]
+    stamp = (sourceindex_version, parseUsfm.parser_version, digest)
+    indexpath = os.path.join(os.path.dirname(sourcepath), ".verifyUSFM-index", os.path.basename(sourcepath) + ".pickle")
+    try:
+        with io.open(indexpath, "rb") as input:
+            saved, index = pickle.load(input)
+    except (OSError, EOFError, ValueError, TypeError, pickle.UnpicklingError):
+        saved = None
+    if saved != stamp:
+        reportStatus(f"Loading source text...")
+        sys.stdout.flush()
+        index = indexSource(data.decode("utf-8-sig"))
+        try:
+            os.makedirs(os.path.dirname(indexpath), exist_ok=True)
+            with io.open(indexpath + ".new", "wb") as output:
+                pickle.dump((stamp, index), output, pickle.HIGHEST_PROTOCOL)
+            os.replace(indexpath + ".new", indexpath)
+        except OSError:
+            pass
+    source_indexes[sourcepath] = (digest, index)
+    return index
+
+# Loads the index of the source text for the current book if compare_dir is set.
 def load_source(fname):
     sourcedir = config['compare_dir']
     if sourcedir:
         sourcepath = os.path.join(sourcedir, fname)
         if os.path.isfile(sourcepath):
-            reportStatus(f"Loading source text...")
-            sys.stdout.flush()
-            scanSourceFile(sourcepath)
+            state.sourcetext = sourceIndex(sourcepath)
 
 # Compares current verse to the source text
 # Returns Jaccard Similarity value, and number of words of length > 2 in common.
 def similarToSource():
-    similarity = 0
-    n = 0
-    if state.sourcetext and state.reference in state.sourcetext:
-        A = set(state.sourcetext[state.reference].split())
-        B = set(state.versetext.split())
-        wordsincommon = [w for w in A&B if len(w) > 2 and w.islower()]
-        n = len(wordsincommon)
-        similarity = n / len(A|B)
-    return (similarity, n)
+    return similarities(state.sourcetext, {state.reference: state.versetext}).get(state.reference, (0, 0))
+
+untranslated_similarity = 0.4   # verses more similar to the source text than this may be untranslated
+
+# Returns the similarity of each verse of a translation to the source text, for a whole book or more at once:
+# a dict of reference -> (Jaccard Similarity value, number of words of length > 2 in common), as similarToSource() returns.
+# index is the index of the source text, from sourceIndex(). verses is a dict of reference -> verse text.
+# Only the references found in both are scored.
+def similarities(index, verses):
+    scores = {}
+    for reference, text in verses.items():
+        if reference in index:
+            words, common = index[reference]
+            B = set(text.split())
+            n = len(common & B)
+            union = len(words | B)
+            scores[reference] = (n / union if union else 0, n)
+    return scores
+
+# Returns the similarities of all the verses in a book of the translation to the source text in sourcepath.
+# The verses of the translation are found the same way as those of the source text.
+def bookSimilarities(contents, sourcepath):
+    return similarities(sourceIndex(sourcepath), scanVerses(contents))
 
 # Report missing text or all ASCII text, in previous verse
 def previousVerseCheck():
@@ -562,10 +700,10 @@ def previousVerseCheck():
             reportError("Empty verse: " + state.reference, 1)
         elif not isShortVerse(state.reference):
             reportError("Verse fragment: " + state.reference, 2)
-    if not suppress[9] and state.asciiVerse and state.getTextLength() > 0:
+    if checkMode(9) != OFF and state.asciiVerse and state.getTextLength() > 0:
         reportError("Verse is entirely ASCII: " + state.reference, 3)
     (sim, n) = similarToSource()
-    if sim > 0.4:
+    if sim > untranslated_similarity:
         reportError(f"Verse may be untranslated (based on words in common): {state.reference}", 3.5)
 
 def longChunkCheck():
@@ -661,7 +799,7 @@ def takeCL(label):
             reportError(f"Non-standard chapter label at {state.reference}: {label}", 42)
 
 def takeD():
-    if not suppress[4]:
+    if checkMode(4) != OFF:
         reportSectionPrecedentErrors('d')
     reportParagraphMarkerErrors('d')
     state.addUncountedParagraph()
@@ -696,7 +834,7 @@ def takeID(id):
     state.addID(id)
 
 def reportParagraphMarkerErrors(type):
-    if state.currItemCategory in {QQ,PP} and not suppress[4]:
+    if state.currItemCategory in {QQ,PP} and checkMode(4) != OFF:
         reportError("Warning: back to back paragraph/poetry markers near: " + state.reference, 24)
     if type == 'p' and state.needText() and not isOptional(state.reference):
         reportError("Paragraph marker after verse marker, or empty verse: " + state.reference, 25)
@@ -705,11 +843,11 @@ def reportParagraphMarkerErrors(type):
 
 def takeP(type):
     reportParagraphMarkerErrors(type)
-    if not aligned_usfm and not suppress[3] and not state.sentenceEnded():
+    if not aligned_usfm and checkMode(3) != OFF and not state.sentenceEnded():
         if state.verse > 0:
-            reportError(f"Check paragraph-ending punctuation at: {state.reference}", 26, suppress[11])
+            reportError(f"Check paragraph-ending punctuation at: {state.reference}", 26, checkMode(11) == TOTALS)
         elif state.reference != "ACT 22":
-            reportError(f"Punctuation missing at end of chapter before {state.reference}", 26.1, suppress[11])
+            reportError(f"Punctuation missing at end of chapter before {state.reference}", 26.1, checkMode(11) == TOTALS)
     if type in {'nb'}:
         state.addUncountedParagraph()
     else:
@@ -733,7 +871,7 @@ def reportSectionPrecedentErrors(tag):
         reportError(f"\\b may not be used before or after section heading. {state.reference}", 29)
 
 def takeSection(tag):
-    if tag != 's5' and not suppress[4]:
+    if tag != 's5' and checkMode(4) != OFF:
         reportSectionPrecedentErrors(tag)
     if state.currItemCategory == S:
         reportError(f"Back to back section markers after {state.reference}", 29.5)
@@ -750,9 +888,9 @@ def takeTitle(token):
         #         reportError(f"toc3 value ({token.value}) not the same as book ID in {state.reference}", 64.5)
     else:
         state.addTitle(token.value)
-    if token.isMT() and token.value.isascii() and not suppress[9]:
+    if token.isMT() and token.value.isascii() and checkMode(9) != OFF:
         reportError("mt token has ASCII value in " + state.reference, 30)
-    if token.value.isupper() and not state.upperCaseReported and not suppress[8]:
+    if token.value.isupper() and not state.upperCaseReported and checkMode(8) != OFF:
         reportError("Upper case book title in " + state.reference, 31)
         state.reportedUpperCase()
     if token.value.startswith("Ii"):
@@ -795,7 +933,7 @@ def takeV(vstr):
         if state.chapter == 0:
             reportError("Missing chapter tag: " + state.reference, 36)
         if state.verse == 1 and state.needPP:
-            reportError("Need paragraph marker before: " + state.reference, 37, suppress[2])
+            reportError("Need paragraph marker before: " + state.reference, 37, checkMode(2) == TOTALS)
         if state.needQQ:
             reportError("Need \\q or \\p after acrostic heading before: " + state.reference, 38)
             state.resetPoetry()
@@ -846,16 +984,17 @@ def reportFootnote(trigger):
 # Warns when the specified string is supposed to start a sentence but the first word is not capitalized.
 # Warns when a sentence later in the string does not start with a capital letter.
 def reportCaps(s):
+    totals = checkMode(10) == TOTALS
     if state.needCaps():
         word = sentences.firstword(s)
         if word and word[0].islower():
             if state.currItemCategory == PP or state.prevItemCategory == PP:
-                reportError(f"First word of paragraph not capitalized near {state.reference}", 44, suppress[10])
+                reportError(f"First word of paragraph not capitalized near {state.reference}", 44, totals)
             else:
-                reportError(f"First word in sentence is not capitalized: \"{word}\" at {state.reference}", 44.1, suppress[10])
+                reportError(f"First word in sentence is not capitalized: \"{word}\" at {state.reference}", 44.1, totals)
     for word in sentences.nextfirstwords(s):
         if word[0].islower():
-            reportError(f"First word in sentence is not capitalized: \"{word}\" in {state.reference}", 44.1, suppress[10])
+            reportError(f"First word in sentence is not capitalized: \"{word}\" in {state.reference}", 44.1, totals)
 
 # Returns a string containing text preceding specified start position and following end position
 def context(text, start, end):
@@ -878,9 +1017,19 @@ spacey4_re = re.compile(r'[\s][\(\'"«“‘’”»›]$', re.UNICODE)       #
 wordmedial_punct_re = re.compile(r'[\w][.?!;:,()\[\]"«“‘”»›][.?!;:,()\[\]\'"«“‘’”»›]*[\w]')
 outsidequote_re = re.compile(r'([\'"’”»›][\.!])', re.UNICODE)   # Period or exclamation outside closing quote.
 
-def reportPunctuation(text):
+# Characters that every match of the above expressions must contain.
+# takeText() makes the set of characters in each piece of text once, and the checks skip the searches
+# that cannot find anything in it, which is most of them for most pieces of text.
+punctuation_chars = frozenset('.?!;:,')
+spacey_chars = frozenset('.?!;:,)’”»›')
+outsidequote_chars = frozenset('\'"’”»›')
+floating_chars = frozenset('[](\'"«“‘’”»›')      # spacey2_re, spacey3_re and spacey4_re
+wordmedial_chars = frozenset('.?!;:,()[]"«“‘”»›')
+
+# Reports punctuation issues in text. textchars is the set of characters in text.
+def reportPunctuation(text, textchars):
     global lastToken
-    if bad := punctuation_re.search(text):
+    if not textchars.isdisjoint(punctuation_chars) and (bad := punctuation_re.search(text)):
         i = bad.start()
         if text[i:i+3] != '...' or text[i:i+4] == "....":
             chars = bad.group(1)
@@ -895,33 +1044,34 @@ def reportPunctuation(text):
         #i = bad.start()
         #if text[i:i+3] != "..." or text[i:i+4] == "....":   # Don't report proper ellipses ...
             #reportError("Check repeated punctuation at " + state.reference + ": " + bad.group(1), 47)
-    if bad := spacey_re.search(text):
+    if not textchars.isdisjoint(spacey_chars) and (bad := spacey_re.search(text)):
         reportError("Space before phrase ending mark at " + state.reference + ": " + bad.group(1), 48)
-    if bad := outsidequote_re.search(text):
+    if not textchars.isdisjoint(outsidequote_chars) and (bad := outsidequote_re.search(text)):
         i = bad.start()
         if text[i+1:i+4] != "...":
             reportError(f"Punctuation after quote mark at {state.reference}: {bad.group(1)}", 50)
 
-    if bad := spacey2_re.search(text):
-        s = context(text, bad.start()-2, bad.end()+2)
-    elif bad := spacey3_re.match(text):
-        s = context(text, 0, bad.end()+2)
-    elif bad := spacey4_re.search(text):
-        s = context(text, bad.start()-2, len(text))
-    if bad:
-        reportError(f"Free floating mark at {state.reference}: {s}", 49)
-
-    if "''" in text or '""' in text:
+    if not textchars.isdisjoint(floating_chars):
+        if bad := spacey2_re.search(text):
+            s = context(text, bad.start()-2, bad.end()+2)
+        elif bad := spacey3_re.match(text):
+            s = context(text, 0, bad.end()+2)
+        elif bad := spacey4_re.search(text):
+            s = context(text, bad.start()-2, len(text))
+        if bad:
+            reportError(f"Free floating mark at {state.reference}: {s}", 49)
+
+    if ("'" in textchars and "''" in text) or ('"' in textchars and '""' in text):
         reportError("Repeated quotes at " + state.reference, 51)
-    bad = wordmedial_punct_re.search(text)
+    bad = wordmedial_punct_re.search(text) if not textchars.isdisjoint(wordmedial_chars) else None
     if bad and text[bad.end()-1] not in "0123456789":
         s = context(text, bad.start(), bad.end())
         reportError(f"Word medial punctuation in {state.reference}: {s}", 52)
-    if '/' in text:
+    if '/' in textchars:
         reportError(f"Forward slash in {state.reference}", 52.1)
-    if '\\' in text:
+    if '\\' in textchars:
         reportError(f"Backslash in {state.reference}", 52.2)
-    if '=' in text:
+    if '=' in textchars:
         reportError(f"Equals sign (=) in {state.reference}", 52.3)
 
 numberembed_re = re.compile(r'[^\s,:\.\d\(\[\-]+[\d]+[^\s,;\.\d\)\]]+')
@@ -933,7 +1083,11 @@ leadingzero_re = re.compile(r'[\s]0[0-9,]*', re.UNICODE)
 number_re = re.compile(r'[^\d(](\d+)[^\d,]')       # possible verse number in text
 chapverse_re = re.compile(r'(\d+)([:\-])(\d+)')
 
-def reportNumbers(t, footnote):
+# Reports issues with numbers in t. textchars is the set of characters in t.
+# Every expression above matches at least one digit, so there is nothing to report if t has none.
+def reportNumbers(t, footnote, textchars):
+    if not any(map(str.isdecimal, textchars)):     # str.isdecimal() is true for the characters that \d matches
+        return
     verseflag = False
     if state.chapter > 0 and not footnote:
         if t.startswith(str(state.verse) + " "):
@@ -971,6 +1125,57 @@ def reportNumbers(t, footnote):
 
 period_re = re.compile(r'[\s]*[\.,;:!\?]')  # detects phrase-ending punctuation standing alone or starting a phrase
 
+def checkPunctuation(t, footnote, textchars):
+    reportPunctuation(t, textchars)
+
+def checkLeadingPunctuation(t, footnote, textchars):
+    if period := period_re.match(t):    # text starts with a period
+        if len(t) <= period.end() + 1:
+            reportError(f"Orphaned punctuation at {state.reference}", 58)
+        else:
+            reportError("Text begins with phrase-ending punctuation in " + state.reference, 58.1)
+
+def checkFootnotes(t, footnote, textchars):
+    if lastToken and lastToken.isV():
+        reportFootnotes(t)
+
+def checkNumbers(t, footnote, textchars):
+    reportNumbers(t, footnote, textchars)
+
+def checkCaps(t, footnote, textchars):
+    if not footnote:
+        reportCaps(t)
+
+# What a suppress flag does to the checks it controls, when it is set.
+# Every suppress flag is tested through checkMode(). Flag 12 is not in the suppress list; main() reads it from the config.
+REPORT = 0      # nothing, the issues are reported individually (the flag is not set)
+TOTALS = 1      # the issues are only counted in the summary
+OFF = 2         # the checks are not made
+suppress_modes = {1: OFF, 2: TOTALS, 3: OFF, 4: OFF, 5: OFF, 6: OFF, 7: OFF, 8: OFF, 9: OFF, 10: TOTALS, 11: TOTALS}
+
+# Returns what the specified suppress flag does now, or REPORT for flag 0, which means no flag.
+def checkMode(flag):
+    return suppress_modes[flag] if flag and suppress[flag] else REPORT
+
+# The checks that takeText() makes on each piece of text, in order:
+# (check function, the suppress flag that controls it or 0, whether it is made on aligned usfm)
+text_check_registry = [
+    (checkPunctuation, 3, False),
+    (checkLeadingPunctuation, 0, True),
+    (checkFootnotes, 0, False),
+    (checkNumbers, 1, True),
+    (checkCaps, 10, True),
+]
+
+# Returns the text checks to make on the current file, leaving out those that are turned off.
+def textChecks():
+    return [check for check, flag, aligned in text_check_registry
+            if checkMode(flag) != OFF and (aligned or not aligned_usfm)]
+
+# The checks made on the text of the current file. verifyContents() sets them for each file.
+# Until then they are the checks for the default settings, for callers of take() and takeText().
+text_checks = textChecks()
+
 # Performs checks on some text, at most a verse in length.
 def takeText(t, footnote=False):
     global lastToken
@@ -994,19 +1199,10 @@ def takeText(t, footnote=False):
             reportError("Angle bracket not closed at " + state.reference, 56)
     if "Conflict Parsing Error" in t:
         reportError("BTT Writer artifact in " + state.reference, 57)
-    if not suppress[3] and not aligned_usfm:    # report punctuation issues
-        reportPunctuation(t)
-    if period := period_re.match(t):    # text starts with a period
-        if len(t) <= period.end() + 1:
-            reportError(f"Orphaned punctuation at {state.reference}", 58)
-        else:
-            reportError("Text begins with phrase-ending punctuation in " + state.reference, 58.1)
-    if lastToken and lastToken.isV() and not aligned_usfm:
-        reportFootnotes(t)
-    if not suppress[1]:
-        reportNumbers(t, footnote)
+    textchars = set(t)
+    for check in text_checks:
+        check(t, footnote, textchars)
     if not footnote:
-        reportCaps(t)
         state.endSentence( sentences.endsSentence(t) )
     state.addText(t)
     addWords(t)
@@ -1093,66 +1289,142 @@ def isTitleToken(token):
 def isNumericCandidate(token):
     return token.isTEXT() or isTitleToken(token) or token.isCL() or token.isCP() or token.isFT()
 
+# Handles the next token in the file.
+# The token is passed to the handler for its type in take_handlers, which does what takeHandler() decides for the type.
 def take(token):
     global lastToken
-    global usfm_version
+    handler = take_handlers.get(token.type) or takeHandler(token)
+    if handler(token):
+        return      # the file cannot be checked further
+    lastToken = token
 
-    if not token.isTEXT():
-        if not state.addMarker(token):
-            reportError(f"Back to back markers of type {token.type} at {state.reference}", 62)
-    else:
-        takeText(token.value, state.inFootnote())
+    # if config['language_code'] in {"ur"} and isNumericCandidate(token) and re.search(r'[0-9]', token.value):
+        # reportError("Arabic numerals in footnote at " + state.reference, 68)
 
+# Returns the function that take() calls for the token, and for every token of the same type.
+# The function returns True if the file cannot be checked further.
+def takeHandler(token):
+    if token.isTEXT():
+        return takeTextToken
     if token.isID():
-        takeID(token.value)
+        handle = takeIDToken
     elif token.isV():
-        takeV(token.value)
+        handle = takeVToken
     elif token.isC():
-        if not suppress[5]:
-            verifyVerseCount()  # for the preceding chapter
-        if not state.ID:
-            reportError("Missing book ID: " + state.reference + " Cannot check this file.", 62.1)
-            state.canContinue = False
-            return
-        if token.value == "1":
-            verifyBookTitle()
-        takeC(token.value)
+        handle = takeCToken
     elif token.isCL():
-        takeCL(token.value)
+        handle = takeCLToken
     elif token.isP() or token.isPI() or token.isPC() or token.isNB() or token.isM():
-        takeP(token.type)
-        if token.value:     # paragraph markers can be followed by text
-            reportError("Unexpected: text returned as part of paragraph token." +  state.reference, 63)
-            takeText(token.value)
+        handle = takePToken
     elif isFootnote(token):
-        takeFootnote(token)
+        handle = takeFootnoteToken
     elif token.isS5():
-        takeS5()
+        handle = takeS5Token
     elif token.isS() or token.isMR() or token.isMS() or token.isSP():
-        takeSection(token.type)
+        handle = takeSectionToken
     elif token.isQA():
-        state.addAcrosticHeading()
+        handle = takeQAToken
     elif isPoetry(token):
-        takeQ(token.type, token.value)
+        handle = takeQToken
     elif token.isD():
-        takeD()
+        handle = takeDToken
     elif token.isB():
-        takeB()
+        handle = takeBToken
     elif isTitleToken(token):
-        takeTitle(token)
+        handle = takeTitleToken
     elif token.isUSFM():    # non-standard USFM token but is used by UnfoldingWord software
-        usfm_version = int(token.value[0])
+        handle = takeUSFMToken
     elif token.isUnknown():
-        if token.value == "p":
-            reportError("Orphaned paragraph marker after " + state.reference, 65)
-        elif token.value == "v":
-            reportError("Unnumbered verse after " + state.reference, 66)
-        elif usfm_version == 2:
-            reportError("Invalid USFM token (\\" + token.value + ") near " + state.reference, 67)
-    lastToken = token
+        handle = takeUnknownToken
+    else:
+        handle = None
+    return markerHandler(handle)
 
-    # if config['language_code'] in {"ur"} and isNumericCandidate(token) and re.search(r'[0-9]', token.value):
-        # reportError("Arabic numerals in footnote at " + state.reference, 68)
+# Returns a function that takes a marker token and passes it on to handle, if any.
+def markerHandler(handle):
+    def takeMarker(token):
+        if not state.addMarker(token):
+            reportError(f"Back to back markers of type {token.type} at {state.reference}", 62)
+        if handle:
+            return handle(token)
+    return takeMarker
+
+def takeTextToken(token):
+    takeText(token.value, state.inFootnote())
+
+def takeIDToken(token):
+    takeID(token.value)
+
+def takeVToken(token):
+    takeV(token.value)
+
+def takeCToken(token):
+    if checkMode(5) != OFF:
+        verifyVerseCount()  # for the preceding chapter
+    if not state.ID:
+        reportError("Missing book ID: " + state.reference + " Cannot check this file.", 62.1)
+        state.canContinue = False
+        return True
+    if token.value == "1":
+        verifyBookTitle()
+    takeC(token.value)
+
+def takeCLToken(token):
+    takeCL(token.value)
+
+def takePToken(token):
+    takeP(token.type)
+    if token.value:     # paragraph markers can be followed by text
+        reportError("Unexpected: text returned as part of paragraph token." +  state.reference, 63)
+        takeText(token.value)
+
+def takeFootnoteToken(token):
+    takeFootnote(token)
+
+def takeS5Token(token):
+    takeS5()
+
+def takeSectionToken(token):
+    takeSection(token.type)
+
+def takeQAToken(token):
+    state.addAcrosticHeading()
+
+def takeQToken(token):
+    takeQ(token.type, token.value)
+
+def takeDToken(token):
+    takeD()
+
+def takeBToken(token):
+    takeB()
+
+def takeTitleToken(token):
+    takeTitle(token)
+
+def takeUSFMToken(token):
+    global usfm_version
+    usfm_version = int(token.value[0])
+
+def takeUnknownToken(token):
+    if token.value == "p":
+        reportError("Orphaned paragraph marker after " + state.reference, 65)
+    elif token.value == "v":
+        reportError("Unnumbered verse after " + state.reference, 66)
+    elif usfm_version == 2:
+        reportError("Invalid USFM token (\\" + token.value + ") near " + state.reference, 67)
+
+# Returns a map from each token type to its handler, for take().
+# The handlers call the take* functions by name, so that profiling can time them.
+def takeHandlers():
+    handlers = {}
+    for uclass, type in parseUsfm.tokenClasses.values():
+        token = uclass()
+        token.type = type
+        handlers[type] = takeHandler(token)
+    return handlers
+
+take_handlers = takeHandlers()
 
 bad_chapter_re1 = re.compile(r'[^\n](\\c\s*\d+)', re.UNICODE)
 bad_chapter_re2 = re.compile(r'(\\c[0-9]+)', re.UNICODE)
@@ -1161,23 +1433,23 @@ bad_verse_re1 = re.compile(r'([^\n\r\s]\\v\s*\d+)', re.UNICODE)
 bad_verse_re2 = re.compile(r'(\\v[0-9]+)', re.UNICODE)
 bad_verse_re3 = re.compile(r'(\\v\s*[-0-9]+[^-\d\s])', re.UNICODE)
 
-# Receives the text of an entire book as input.
+# Receives the matches that scanStructure() found in the text of an entire book.
 # Reports bad patterns.
-def verifyChapterAndVerseMarkers(text, path):
-    for badactor in bad_chapter_re1.finditer(text):
+def verifyChapterAndVerseMarkers(structure, path):
+    for badactor in structure[bad_chapter_re1]:
         reportError("Missing newline before chapter marker: " + badactor.group(1) + " in " + path, 69)
-    for badactor in bad_chapter_re2.finditer(text):
+    for badactor in structure[bad_chapter_re2]:
         reportError("Missing space before chapter number: " + badactor.group(0) + " in " + path, 70)
-    for badactor in bad_chapter_re3.finditer(text):
+    for badactor in structure[bad_chapter_re3]:
         reportError("Missing space after chapter number: " + badactor.group(1) + " in " + path, 71)
-    for badactor in bad_verse_re1.finditer(text):
+    for badactor in structure[bad_verse_re1]:
         s = badactor.group(1)
         if s[0] < ' ' or s[0] > '~': # not printable ascii
             s = s[1:]
         reportError("Missing white space before verse marker: " + s + " in " + path, 72)
-    for badactor in bad_verse_re2.finditer(text):
+    for badactor in structure[bad_verse_re2]:
         reportError("Missing space before verse number: " + badactor.group(0) + " in " + path, 73)
-    for badactor in bad_verse_re3.finditer(text):
+    for badactor in structure[bad_verse_re3]:
         s = badactor.group(1)
 #        if s[-1] < ' ' or s[-1] > '~': # not printable ascii
 #            s = s[:-1]
@@ -1193,29 +1465,27 @@ def verifyParagraphCount():
 orphantext_re = re.compile(r'\n\n[^\\]', re.UNICODE)
 embeddedquotes_re = re.compile(r"\w'\w")
 
-# Receives the text of an entire book as input.
+# Receives the text of an entire book as input, with what scanStructure() found in it.
 # Verifies things that are better done as a whole file.
 # Can't report verse references because we haven't started to parse the book yet.
-def verifyWholeFile(contents, path):
+def verifyWholeFile(contents, structure, path):
     if not contents.startswith("\\id "):
         reportError(f"USFM file does not start with book id: {shortname(path)}", 74.1)
-    verifyChapterAndVerseMarkers(contents, path)
+    verifyChapterAndVerseMarkers(structure, path)
 
-    lines = contents.split('\n')
-    orphans = orphantext_re.search(contents)
-    if orphans:
-        reportOrphans(lines, path)
+    if structure[orphantext_re]:
+        reportOrphans(contents.split('\n'), path)
 
-    if not suppress[6]:
-        nembedded = len(embeddedquotes_re.findall(contents))
-        nsingle = contents.count("'") - nembedded
-        ndouble = contents.count('"')
+    if checkMode(6) != OFF:
+        nembedded = len(structure[embeddedquotes_re])
+        nsingle = structure["'"] - nembedded
+        ndouble = structure['"']
         if ndouble > 0:
-            if nsingle == 0 or suppress[7]:
+            if nsingle == 0 or checkMode(7) == OFF:
                 reportError(f"Straight quotes in {shortname(path)}: {ndouble} doubles.", 75)
             else:
                 reportError(f"Straight quotes in {shortname(path)}: {ndouble} doubles, {nsingle} singles not counting {nembedded} word-medial.", 75)
-        elif nsingle > 0 and not suppress[7]:
+        elif nsingle > 0 and checkMode(7) != OFF:
             reportError(f"Straight quotes in {shortname(path)}: {nsingle} singles not counting {nembedded} word-medial.", 75)
 
 conflict_re = re.compile(r'<+ HEAD', re.UNICODE)   # conflict resolution tag
@@ -1233,74 +1503,500 @@ def reportOrphans(lines, path):
 wjwj_re = re.compile(r' \\wj +\\wj\*', flags=re.UNICODE)
 backslasheol_re = re.compile(r'\\ *\n')
 
-# Corresponding entry point in tx-manager code is verify_contents_quiet()
+# Finds, in one pass, every place where one of the patterns in scan_patterns could start to match:
+# chapter and verse markers, except those that are on a new line and followed by a plain number,
+# which none of the patterns can match, backslashes at the end of a line, \\wj \\wj* pairs, blank lines
+# that are not followed by a marker, and straight quotes.
+structure_re = re.compile(r"[\\\n'\"](?:(?<=\\)(?:c(?:(?<=[^\n]\\c)|(?![ \t]+[0-9]+\s))|v(?:(?<=\S\\v)|(?![ \t]+[-0-9]+\s))"
+                          r"| *(?=\n)|wj +\\wj\*)|(?<=\n)(?=\n[^\\])|(?<=['\"]))")
+
+# The patterns to match at each kind of place that structure_re finds, keyed by the first two characters
+# that it finds there, with where each pattern starts to match, relative to the place.
+# None of what structure_re takes at one place can include the start of another place.
+scan_patterns = {
+    '\\c': ((bad_chapter_re1, -1), (bad_chapter_re2, 0), (bad_chapter_re3, 0)),
+    '\\v': ((bad_verse_re1, -1), (bad_verse_re2, 0), (bad_verse_re3, 0)),
+    '\\': ((backslasheol_re, 0),),
+    '\\ ': ((backslasheol_re, 0),),
+    '\\w': ((wjwj_re, -1),),
+    '\n': ((orphantext_re, 0),),
+    "'": ((embeddedquotes_re, -1),),
+    '"': (),
+}
+
+# Scans the text of a whole book once, for everything that is checked over the whole file.
+# Returns a dict that maps each of the patterns in scan_patterns to the list of matches that its finditer() would
+# return, and each straight quote character to the number of times it occurs.
+def scanStructure(text):
+    structure = {"'": 0, '"': 0}
+    ends = dict()   # where the last match of each pattern ends, so that matches do not overlap, as in finditer()
+    for patterns in scan_patterns.values():
+        for pattern, offset in patterns:
+            structure[pattern] = []
+            ends[pattern] = 0
+    for found in structure_re.finditer(text):
+        key = found.group()[:2]
+        if key in structure:
+            structure[key] += 1
+        for pattern, offset in scan_patterns[key]:
+            start = found.start() + offset
+            if start >= ends[pattern]:
+                match = pattern.match(text, start)
+                if match:
+                    structure[pattern].append(match)
+                    ends[pattern] = match.end()
+    return structure
+
 def verifyFile(path):
-    global aligned_usfm
-    global lastToken
-    lastToken = None
+    with verifier_lock:
+        contents = readUsfm(path)
+        if contents is not None:
+            verifyContents(contents, path)
 
+# Returns the contents of a usfm file, or None if it is not UTF-8, which is reported.
+def readUsfm(path):
     with io.open(path, "tr", encoding="utf-8-sig") as input:
         try:
-            contents = input.read(-1)
+            return input.read(-1)
         except UnicodeDecodeError as e:
             reportError("File appears to not be UTF-8: " + shortname(path), 79.2 )
             reportError(str(e))   # 0x92 is Windows encoding for right single quote mark; 0x92 is invalid in UTF-8.
-            return
+            return None
 
-    if wjwj_re.search(contents):
-        reportError("Empty \\wj \\wj* pair(s) in " + shortname(path), 77)
-    if backslasheol_re.search(contents):
-        reportError("Stranded backslash(es) at end of line(s) in " + shortname(path), 78)
-    if '\x00' in contents:
-        reportError("Null bytes found in " + shortname(path), 79)
-        if contents.count('\x00') == len(contents):
+# Verifies the contents of a usfm file. path is used in messages, and to find the source text.
+# Corresponding entry point in tx-manager code is verify_contents_quiet()
+def verifyContents(contents, path):
+    global aligned_usfm
+    global lastToken
+    with verifier_lock:
+        lastToken = None
+
+        aligned = ("lemma=" in contents or "x-occurrences" in contents)
+        if aligned:     # the alignments are full of straight quotes, so just look for these two, and scan the unaligned text
+            structure = {wjwj_re: wjwj_re.search(contents), backslasheol_re: backslasheol_re.search(contents)}
+        else:
+            structure = scanStructure(contents)
+        if structure[wjwj_re]:
+            reportError("Empty \\wj \\wj* pair(s) in " + shortname(path), 77)
+        if structure[backslasheol_re]:
+            reportError("Stranded backslash(es) at end of line(s) in " + shortname(path), 78)
+        if contents and not contents.strip('\x00'):
+            reportError("Null bytes found in " + shortname(path), 79)
             reportError("File is entirely null bytes: " + shortname(path), 79.1)
             return
 
-    aligned_usfm = ("lemma=" in contents or "x-occurrences" in contents)
-    if aligned_usfm:
-        contents = usfm_utils.unalign_usfm(contents)
+        aligned_usfm = aligned
+        if aligned_usfm:
+            contents = usfm_utils.unalign_usfm(contents)
+            structure = scanStructure(contents)
+        global text_checks
+        text_checks = textChecks()
 
-    state.canContinue = True
+        state.canContinue = True
 
-    if len(contents) < 100:
-        reportError("Incomplete file: " + shortname(path), 80)
-    else:
-        load_source(os.path.basename(path))
-        reportProgress(f"Checking {shortname(path)}...")
-        sys.stdout.flush()
-        tokens = parseUsfm.parseString(contents)    # Slow!
-        verifyWholeFile(contents, shortname(path))  # placed after parseUsfm so that its error messages come after the long parsing time pause
-        for token in tokens:
-            take(token)
-            if not state.canContinue:
-                state.addID("")
-                sys.stderr.flush()
-                return
-        if (usfm_version == 2 or aligned_usfm) and not state.toc3:
-            reportError("No \\toc3 tag in " + shortname(path), 81)
-        previousVerseCheck()       # checks last verse in the file
-        verifyNotEmpty(path)
-        if not suppress[5]:
-            verifyVerseCount()      # for the last chapter
-        verifyChapterCount()
-        verifyFootnotes()
-        verifyChapterTitles()
-        verifyParagraphCount()
-        state.addID("")
-        sys.stderr.flush()
+        if len(contents) < 100:
+            if '\x00' in contents:
+                reportError("Null bytes found in " + shortname(path), 79)
+            reportError("Incomplete file: " + shortname(path), 80)
+        else:
+            load_source(os.path.basename(path))
+            reportProgress(f"Checking {shortname(path)}...")
+            sys.stdout.flush()
+            diagnostics = []
+            tokens = parseUsfm.iterTokens(contents, diagnostics=diagnostics)     # tokens are generated one chapter at a time, as they are taken
+            if timings is not None:
+                tokens = timedTokens(tokens)
+            verifyWholeFile(contents, structure, shortname(path))
+            for token in tokens:
+                take(token)
+                if not state.canContinue:
+                    reportParseErrors(diagnostics, path)
+                    state.addID("")
+                    sys.stderr.flush()
+                    return
+            reportParseErrors(diagnostics, path)
+            if (usfm_version == 2 or aligned_usfm) and not state.toc3:
+                reportError("No \\toc3 tag in " + shortname(path), 81)
+            previousVerseCheck()       # checks last verse in the file
+            verifyNotEmpty(path)
+            if checkMode(5) != OFF:
+                verifyVerseCount()      # for the last chapter
+            verifyChapterCount()
+            verifyFootnotes()
+            verifyChapterTitles()
+            verifyParagraphCount()
+            state.addID("")
+            sys.stderr.flush()
+
+# Reports the problems found by the parser, which skipped any bad input and carried on.
+# Null characters are counted by the parser, so this is where they are reported.
+def reportParseErrors(diagnostics, path):
+    if any(d.kind == 'nul' for d in diagnostics):
+        reportError("Null bytes found in " + shortname(path), 79)
+    for d in diagnostics:
+        if d.kind != 'nul':
+            reportError(f"Unparsable usfm in {shortname(path)}, {d}", 79.3)
 
-# Verifies all .usfm files under the specified folder.
-def verifyDir(workdir):
+# Yields the paths of all .usfm files under the specified folder, in the order they are verified.
+def usfmPaths(workdir):
     dirpath = Path(workdir)
     for path in dirpath.iterdir():
         if path.name[0] != '.':         # ignore hidden files
             if path.is_dir():
                 # It's a directory, recurse into it
-                verifyDir(path)
+                yield from usfmPaths(path)
             elif path.is_file() and path.name[-3:].lower() == 'sfm':
+                yield path
+
+# Verifies all .usfm files under the specified folder.
+# With more than one worker, the files are verified in parallel by verifyFiles().
+# With a cache folder, the results for each file are kept there, and reused while the file is unchanged.
+def verifyDir(workdir, workers=1, cachedir=None):
+    with verifier_lock:
+        paths = list(usfmPaths(workdir))
+        if cachedir or (workers > 1 and len(paths) > 1):
+            verifyFiles(paths, workers, cachedir)
+        else:
+            for path in paths:
                 verifyFile(path)
 
+idtoken_re = re.compile(r'\\id\s+(\S{0,3})')
+usfmtoken_re = re.compile(r'\\usfm\s+(\d)')
+
+# The state that a serial run carries from one file to the next, other than what is keyed by book ID:
+# the usfm_version, and whether no file has been parsed yet, which leaves the State as it was created.
+def carriedState():
+    return (usfm_version, not state.getIDs())
+
+# Returns the book ID of the file, the carried state after the file, given the carried state before it,
+# and a hash of the file's contents.
+# The ID and state are guesses, made without parsing the file. Returns None as the book ID if the file can't be read.
+def prescan(path, carried):
+    with io.open(path, "rb") as input:
+        data = input.read()
+    digest = hashlib.blake2b(data, digest_size=20).hexdigest()
+    try:
+        contents = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return (None, carried, digest)
+    id = idtoken_re.search(contents)
+    versions = usfmtoken_re.findall(contents)
+    version, fresh = carried
+    parsed = len(contents) >= 100 and contents.strip('\x00')
+    return (id.group(1).upper() if id else "", (int(versions[-1]) if versions else version, fresh and not parsed), digest)
+
+# The module globals that verifyWorker() sets.
+worker_globals = ('config', 'suppress', 'std_titles', 'usfm_version', 'state', 'wordlist', 'recorder',
+                  'gui', 'listener', 'issuesFile', 'aligned_usfm', 'lastToken')
+
+# Verifies one file in a worker process, starting with the specified carried state.
+# Returns the report calls made, the words found, the book IDs, and the carried state at the end.
+def verifyWorker(args):
+    global config, suppress, std_titles, usfm_version, state, wordlist, recorder, gui, listener, issuesFile
+    (path, config, suppress, std_titles, (usfm_version, fresh)) = args
+    state = State()
+    if not fresh:
+        state.addID("")     # as verifyFile() leaves it after a book
+        state.IDs.clear()
+    wordlist = dict()
+    recorder = []
+    gui = listener = issuesFile = None
+    verifyFile(path)
+    return (recorder, wordlist, state.getIDs(), (usfm_version, fresh and not state.getIDs()))
+
+# Gives a worker process a verifier_lock of its own.
+# A forked process gets a copy of this one, held by a thread that it may not have.
+def initWorker():
+    global verifier_lock
+    verifier_lock = threading.RLock()
+
+# Runs verifyWorker() in this process, leaving the module globals as they were.
+def verifyRecorded(args):
+    module = globals()
+    saved = {key: module[key] for key in worker_globals}
+    try:
+        return verifyWorker(args)
+    finally:
+        module.update(saved)
+
+# Verifies the files, in a pool of worker processes if workers > 1, and merges the results in the order of paths,
+# so the output is the same as verifying them one after another.
+# Some state is carried from one file to the next in a serial run, which the workers cannot see:
+#   The carried state, which is guessed by prescan(). A file whose guess turns out wrong is verified again.
+#   References with errors and the source text, keyed by book ID. If two files have the same ID,
+#   all the files are verified serially.
+# If cachedir is specified, results are looked up there, and new results stored there, by a ResultCache.
+def verifyFiles(paths, workers, cachedir=None):
+    global usfm_version
+    with verifier_lock:
+        starts = []
+        ids = []
+        digests = []
+        carried = carriedState()
+        for path in paths:
+            starts.append(carried)
+            id, carried, digest = prescan(path, carried)
+            ids.append(id if id is not None else path)
+            digests.append(digest)
+        if len(set(ids)) < len(ids):
+            for path in paths:
+                verifyFile(path)
+            return
+
+        settings = (dict(config), suppress, std_titles)
+        cache = ResultCache(cachedir, settings) if cachedir else None
+        keys = [cache.key(path, digest, start) if cache else None for path, digest, start in zip(paths, digests, starts)]
+        found = [cache.get(key) if cache else None for key in keys]
+        missing = [(path, *settings, start) for path, start, result in zip(paths, starts, found) if result is None]
+        if workers > 1 and len(missing) > 1:
+            import concurrent.futures       # only needed here
+            executor = concurrent.futures.ProcessPoolExecutor(workers, initializer=initWorker)
+            fresh = executor.map(verifyWorker, missing)
+        else:
+            executor = None
+            fresh = map(verifyRecorded, missing)
+        try:
+            for i, path in enumerate(paths):
+                result = found[i]
+                if result is None:
+                    result = next(fresh)
+                    if cache:
+                        cache.put(keys[i], result)
+                carried = carriedState()
+                if starts[i] != carried:     # wrong guess, so verify the file again
+                    keys[i] = cache.key(path, digests[i], carried) if cache else None
+                    result = cache.get(keys[i]) if cache else None
+                    if result is None:
+                        result = verifyRecorded((path, *settings, carried))
+                        if cache:
+                            cache.put(keys[i], result)
+                calls, words, IDs, end = result
+                for call in calls:
+                    globals()[call[0]](*call[1:])
+                for word, (count, ref) in words.items():
+                    if word in wordlist:
+                        wordlist[word] = (wordlist[word][0] + count, "")
+                    else:
+                        wordlist[word] = (count, ref)
+                if IDs:
+                    state.addID("")
+                    state.IDs[-1:] = IDs
+                usfm_version = end[0]
+        finally:
+            if executor:
+                executor.shutdown()
+        if cache:
+            cache.prune(keys)
+
+# Keeps the result of verifyWorker() for each file in a folder, in a pickle file named by a hash of
+# everything that the result depends on: the file's contents and name, the settings, the carried state
+# before the file, the source text it is compared with, and the version of the checks and the parser.
+class ResultCache:
+    version = 2     # increment when the checks change
+
+    def __init__(self, cachedir, settings):
+        self.cachedir = cachedir
+        self.settings = settings
+        os.makedirs(cachedir, exist_ok=True)
+
+    def key(self, path, digest, carried):
+        config, suppress, std_titles = self.settings
+        comparepath = os.path.join(config['compare_dir'], os.path.basename(path)) if config['compare_dir'] else ""
+        comparedigest = ""
+        if comparepath and os.path.isfile(comparepath):
+            with io.open(comparepath, "rb") as input:
+                comparedigest = hashlib.blake2b(input.read(), digest_size=20).hexdigest()
+        keydata = repr((self.version, parseUsfm.parser_version, shortname(path), digest, carried,
+                        suppress, std_titles, comparepath, comparedigest))
+        return hashlib.blake2b(keydata.encode("utf-8"), digest_size=20).hexdigest()
+
+    # Returns the cached result, or None.
+    def get(self, key):
+        try:
+            with io.open(os.path.join(self.cachedir, key + ".pickle"), "rb") as input:
+                return pickle.load(input)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def put(self, key, result):
+        path = os.path.join(self.cachedir, key + ".pickle")
+        with io.open(path + ".new", "wb") as output:
+            pickle.dump(result, output, pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".new", path)
+
+    # Removes the results for files that are no longer verified with these settings.
+    def prune(self, keys):
+        keep = {key + ".pickle" for key in keys}
+        for name in os.listdir(self.cachedir):
+            if name.endswith(".pickle") and name not in keep:
+                os.remove(os.path.join(self.cachedir, name))
+
+# An issue found by a Verifier.
+class Issue:
+    def __init__(self, message, errorId=0, summarized=False, reference=""):
+        self.message = message
+        self.errorId = errorId
+        self.summarized = summarized    # counted in the summary, but not reported individually
+        self.reference = reference      # where it was found
+
+    def __repr__(self):
+        return f'Issue({self.message!r}, {self.errorId!r}, {self.summarized!r}, {self.reference!r})'
+
+    def __str__(self):
+        return self.message
+
+# The module globals that hold the state of a verification, which a Verifier keeps between calls.
+verifier_globals = ('config', 'suppress', 'std_titles', 'state', 'issues', 'wordlist',
+                    'aligned_usfm', 'usfm_version', 'lastToken')
+
+# Verifies usfm text without writing anything, for services that verify many books in one process.
+# Each Verifier has its own state, equivalent to the module globals that main() sets up,
+# so any number of Verifiers can be used, one book after another, from any number of threads.
+# Verifiers are not concurrent. The state is installed in the module globals while verify_text() runs,
+# holding verifier_lock, so calls take turns with each other and with main() and the other entry points.
+# A Verifier may be used from a listener while main() runs. Use a pool of processes to verify books at the same time.
+# suppress is a list of 12 booleans, like the suppress global. std_titles is a list of standard chapter titles.
+# compare_dir is a folder of source text to compare with, as in the config.
+class Verifier:
+    def __init__(self, suppress=None, std_titles=None, compare_dir=""):
+        self.config = {'source_dir': "", 'compare_dir': compare_dir}
+        self.suppress = list(suppress) if suppress else [False]*12
+        self.std_titles = list(std_titles) if std_titles else []
+        self.state = State()
+        self.issues = dict()        # summary of the issues found so far, like the issues global
+        self.wordlist = dict()
+        self.aligned_usfm = False
+        self.usfm_version = 2
+        self.lastToken = None
+
+    # Verifies the contents of a usfm file. name is the file name used in messages, and to find the source text.
+    # Returns a list of Issues.
+    def verify_text(self, contents, name):
+        global recorder, gui, listener
+        calls = []
+        module = globals()
+        with verifier_lock:
+            saved = {key: module[key] for key in verifier_globals + ('recorder', 'gui', 'listener', 'text_checks')}
+            try:
+                module.update((key, getattr(self, key)) for key in verifier_globals)
+                recorder = calls
+                gui = listener = None
+                verifyContents(contents, name)
+                for call in calls:
+                    if call[0] == 'reportError':
+                        countIssue(*call[1:4])
+            finally:
+                for key in verifier_globals:
+                    setattr(self, key, module[key])
+                module.update(saved)
+        return [Issue(*call[1:]) for call in calls if call[0] == 'reportError']
+
+    # Returns the similarity of every verse in the contents of a usfm file to the source text, as bookSimilarities() does,
+    # or an empty dict if there is no source text for the file.
+    def similarities(self, contents, name):
+        sourcepath = os.path.join(self.config['compare_dir'], os.path.basename(name)) if self.config['compare_dir'] else ""
+        if not sourcepath or not os.path.isfile(sourcepath):
+            return {}
+        global recorder
+        with verifier_lock:
+            saved = recorder
+            recorder = []       # the status message when the source text is indexed
+            try:
+                return bookSimilarities(contents, sourcepath)
+            finally:
+                recorder = saved
+
+# Profiling
+timings = None      # name -> [calls, seconds], while profiling
+
+# The functions that are timed when profiling. The parser is timed by timedTokens().
+# The times are cumulative: the time of take() includes that of the take* handlers, and so on.
+profiled_functions = ('readUsfm', 'scanStructure', 'verifyWholeFile', 'load_source', 'similarToSource', 'take', 'takeText',
+                      'takeB', 'takeC', 'takeCL', 'takeD', 'takeFootnote', 'takeID', 'takeP', 'takeQ', 'takeS5',
+                      'takeSection', 'takeTitle', 'takeV', 'reportPunctuation', 'reportNumbers', 'reportCaps',
+                      'reportFootnotes', 'addWords', 'verifyVerseCount', 'reportMixedCase', 'dumpWords', 'reportIssues')
+
+# Returns a function that calls function, adding its calls and wall time to timings[name].
+def timed(name, function):
+    entry = timings.setdefault(name, [0, 0.0])
+    def timedFunction(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            entry[0] += 1
+            entry[1] += time.perf_counter() - start
+    return timedFunction
+
+# Yields the tokens, adding the time taken to parse each one to timings['parse'].
+def timedTokens(tokens):
+    entry = timings.setdefault('parse', [0, 0.0])
+    tokens = iter(tokens)
+    while True:
+        start = time.perf_counter()
+        token = next(tokens, None)
+        entry[1] += time.perf_counter() - start
+        if token is None:
+            return
+        entry[0] += 1
+        yield token
+
+# Starts timing the profiled functions, the parser, the writing of issues and, if mode is "json" or "pstats",
+# each file, whose profile is written in profiledir. Returns what stopProfiling() needs to put things back.
+def startProfiling(mode, profiledir):
+    global timings, verifyFile
+    timings = dict()
+    module = globals()
+    saved = {name: module[name] for name in profiled_functions + ('verifyFile',)}
+    for name in profiled_functions:
+        module[name] = timed(name, module[name])
+    saved['IssueSink.flush'] = IssueSink.flush
+    IssueSink.flush = timed('IssueSink.flush', IssueSink.flush)
+    if mode in ("json", "pstats"):
+        os.makedirs(profiledir, exist_ok=True)
+        verifyFile = profiledFile(saved['verifyFile'], mode, profiledir)
+    return (saved, time.perf_counter())
+
+def stopProfiling(profiling):
+    global timings
+    saved, start = profiling
+    IssueSink.flush = saved.pop('IssueSink.flush')
+    globals().update(saved)
+    elapsed = time.perf_counter() - start
+    reportTimings(elapsed)
+    timings = None
+
+# Returns a function that verifies a file with verify(), and writes the profile of that file in profiledir:
+# the timings for the file as JSON, or a cProfile of it in pstats format.
+def profiledFile(verify, mode, profiledir):
+    def verifyProfiledFile(path):
+        name = os.path.join(profiledir, shortname(path).replace(os.sep, "_"))
+        if mode == "pstats":
+            import cProfile     # only needed here
+            profiler = cProfile.Profile()
+            profiler.runcall(verify, path)
+            profiler.dump_stats(name + ".pstats")
+        else:
+            before = {key: tuple(entry) for key, entry in timings.items()}
+            verify(path)
+            filetimings = {}
+            for key, (calls, seconds) in timings.items():
+                calls0, seconds0 = before.get(key, (0, 0.0))
+                if calls > calls0:
+                    filetimings[key] = {'calls': calls - calls0, 'seconds': round(seconds - seconds0, 6)}
+            with io.open(name + ".json", "tw", encoding='utf-8', newline='\n') as output:
+                json.dump(filetimings, output, indent=1)
+    return verifyProfiledFile
+
+# Reports the timings as a table, in order of decreasing time.
+def reportTimings(elapsed):
+    lines = [f"\n{'Profile':20s} {'calls':>9s} {'seconds':>9s} {'%':>6s}"]
+    for name, (calls, seconds) in sorted(timings.items(), key=lambda item: item[1][1], reverse=True):
+        if calls:
+            lines.append(f"{name:20s} {calls:9d} {seconds:9.3f} {100 * seconds / elapsed:6.1f}")
+    lines.append(f"{'total':20s} {'':9s} {elapsed:9.3f} {100.0:6.1f}")
+    reportStatus("\n".join(lines))
+
 def main(app=None):
     global config
     global suppress
@@ -1308,49 +2004,69 @@ def main(app=None):
     global wordlist
     # global usfm_version
 
-    wordlist = dict()
-    gui = app
-    config = configmanager.ToolsConfigManager().get_section('VerifyUSFM')   # configmanager version
-    if config:
-        workdir = config['source_dir']
-        for i in range(1, len(suppress)):
-            suppress[i] = config.getboolean('suppress'+str(i), fallback = False)
-        global std_titles
-        std_titles = [ config.get('standard_chapter_title', fallback = '') ]
-        if std_titles == ['']:
-            std_titles = []
-        # uv = config.get('usfm_version', fallback = "2")
-        # usfm_version = int(uv[0])
-
-        global state
-        state = State()
-        global issues
-        issues = dict()
-
-        file = config['filename']
-        if file:
-            path = os.path.join(workdir, file)
-            if os.path.isfile(path):
-                verifyFile(path)
-            else:
-                reportError(f"No such file: {path}")
-        else:
-            verifyDir(workdir)
-        if not config.getboolean('suppress12', fallback = False):
-            reportMixedCase()
-        dumpWords()
-
-        global issuesFile
-        if issuesFile:
-            reportIssues()
-            issuesFile.close()
-            issuesFile = None
-        else:
-            reportStatus("No issues to report.")
-        reportStatus("\nDone.")
-        sys.stdout.flush()
-    if gui:
-        gui.event_generate('<<ScriptEnd>>', when="tail")
+    with verifier_lock:
+        wordlist = dict()
+        gui = app
+        config = configmanager.ToolsConfigManager().get_section('VerifyUSFM')   # configmanager version
+        if config:
+            workdir = config['source_dir']
+            for i in range(1, len(suppress)):
+                suppress[i] = config.getboolean('suppress'+str(i), fallback = False)
+            global std_titles
+            std_titles = [ config.get('standard_chapter_title', fallback = '') ]
+            if std_titles == ['']:
+                std_titles = []
+            # uv = config.get('usfm_version', fallback = "2")
+            # usfm_version = int(uv[0])
+
+            global state
+            state = State()
+            global issues
+            issues = dict()
+            profile = config.get('profile', fallback = '')
+            profiling = startProfiling(profile, os.path.join(workdir, ".verifyUSFM-profile")) if profile else None
+            try:
+                global sink
+                global issuesFile
+                jsonpath = os.path.join(workdir, "issues.jsonl") if config.getboolean('issues_jsonl', fallback = False) else None
+                sink = IssueSink(jsonpath)
+                try:
+                    file = config['filename']
+                    if file:
+                        path = os.path.join(workdir, file)
+                        if os.path.isfile(path):
+                            verifyFile(path)
+                        else:
+                            reportError(f"No such file: {path}")
+                    else:
+                        cachedir = os.path.join(workdir, ".verifyUSFM-cache") if config.getboolean('cache', fallback = False) else None
+                        if profiling:   # every file is verified in this process, to be timed
+                            verifyDir(workdir)
+                        else:
+                            verifyDir(workdir, config.getint('workers', fallback = 1), cachedir)
+                    if not config.getboolean('suppress12', fallback = False):
+                        reportMixedCase()
+                    dumpWords()
+                finally:      # the issues reported so far are passed on, even if verification fails
+                    sink.close()
+                    sink = None
+
+                if issuesFile:
+                    reportIssues()
+                    issuesFile.close()
+                    issuesFile = None
+                else:
+                    reportStatus("No issues to report.")
+            finally:      # issues.txt is closed and the profiled functions are put back, even if verification fails
+                if issuesFile:      # verification failed before the summary was written
+                    issuesFile.close()
+                    issuesFile = None
+                if profiling:
+                    stopProfiling(profiling)
+            reportStatus("\nDone.")
+            sys.stdout.flush()
+        if gui:
+            gui.event_generate('<<ScriptEnd>>', when="tail")
 
 if __name__ == "__main__":
     main()
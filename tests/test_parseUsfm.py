@@ -0,0 +1,284 @@
+# pytest unit tests for functions in parseUsfm.py
+
+import os
+import sys
+
+tests_path = os.path.dirname(os.path.realpath(__file__))
+src_path = os.path.join(os.path.dirname(tests_path), "src")
+sys.path.append(src_path)
+import pytest
+
+sample = '\\id MAT unfoldingWord Literal Text\n\\ide UTF-8\n\\h Matthew\n\\toc1 The Gospel of Matthew\n\\toc2 Matthew\n\\toc3 Mat\n\\mt Matthew\n\n\\s5\n\\c 1\n\\p\n\\v 1 The book of the genealogy of Jesus Christ, son of David, son of Abraham.\n\\v 2 Abraham was the father of Isaac,\\f + \\ft Some versions add \\fqa text\\fqa* here.\\f* and Isaac the father of Jacob.\n\\q1 \\wj Blessed\\wj* are \\add the\\add* poor,\n\\q2 for theirs is the kingdom.\n\\v 3-4 Judah was the \\x - \\xo 1:3 \\xt Gen 38\\x* father.\n\\b\n\\nb\n\\c 2\n\\cl Chapter 2\n\\s1 The visit of the wise men\n\\r (Luke 2:1)\n\\d A psalm\n\\v 1\tAfter Jesus was born\r\n'
+
+def tokenSummary(tokens):
+    return [(type(t).__name__, t.type, t.value) for t in tokens]
+
+@pytest.mark.parametrize('str',
+    [
+        sample,
+        '\\p\r\n',
+        '\\p',                  # no white space after marker
+        '\\c 1',                # no white space after chapter number
+        '\\v 1-2a x',
+        '\\v - x',
+        '\\c\r\n1\r\n',
+        '\\f*x',
+        '\\f**',
+        '\\fq* x',
+        '\\zz\r\n',
+        '\\s\n\\v 1 x',
+        '\\h \n\\toc1 a',
+        '\\f +abc',
+        '\\f - \\ft x',
+        '\\p text\\',           # backslash at end of file
+        '\\\\ a',
+        '\\\\\\x',
+        '\\+xt* a\\+nd x',
+        '\\v 1\t\tword\r',
+        'a\x0bb \\p\x0b',
+        '\\id\tMAT\r\n',
+        '\\c 01 \\v 007\n',
+        '\\mt1\n\n',
+        '\\*',
+        '\\p*x',
+        '\\io1 a\\io x',
+        '\\p\\v 1 x',
+        'a\\\tb',
+        '\\ p',
+        '\\v 1\u2003a',
+        '\\v 1\u200b a',         # zero width space before the white space
+        '\\ip\u2003 x\\tc3\u2003x',
+        'Non\xa0breaking \\v 1 space',
+    ])
+def test_fast_engine_matches_pyparsing(str):
+    import parseUsfm
+    fast = parseUsfm.parseString(str, engine='fast')
+    slow = parseUsfm.parseString(str, engine='pyparsing')
+    assert tokenSummary(fast) == tokenSummary(slow)
+
+# Every marker in the grammar, in each of the contexts that may follow it.
+@pytest.mark.parametrize('follow', [' ', '\n', ' 12 x\n', ' + x', '* x', '*', '', '1 x'])
+def test_all_markers(follow):
+    import parseUsfm
+    keys = sorted(set(parseUsfm.startForms) | {m[:-1] for m in parseUsfm.endMarkers})
+    for key in keys:
+        str = f"\\{key}{follow}"
+        fast = parseUsfm.parseString(str, engine='fast')
+        slow = parseUsfm.parseString(str, engine='pyparsing')
+        assert tokenSummary(fast) == tokenSummary(slow), str
+
+# Every token class is found by its marker, and groups with no class of their own become UnknownTokens.
+def test_createToken():
+    import parseUsfm
+    for key, uclass in parseUsfm.options.items():
+        token = parseUsfm.createToken((key, 'x'))
+        assert type(token) is uclass.plain and isinstance(token, uclass) and token.type == key
+    assert not hasattr(parseUsfm, 'uclass')     # the class tables are built without module level loop variables
+    token = parseUsfm.createToken(('toc', 'Contents'))
+    assert token.isUnknown() and token.getType() == 'unknown' and token.getValue() == 'toc'
+
+def test_empty_string():
+    import parseUsfm
+    assert parseUsfm.parseString('', engine='fast') == []
+
+@pytest.mark.parametrize('str',
+    [
+        sample,
+        sample.replace('\n', '\r\n'),
+        '\\c 1\n\\v 1 a\n\\c 2\n\\v 1 b',
+        '\\v 1 a \\c 2\n\\c 3\n\\p\n\\c 4\n',   # \c not at start of line, and empty chapters
+        '  \n\\c 1\n\\s\n\\c 2\n\\v 1 text\\',
+        '',
+    ])
+def test_iterTokens(str):
+    import io
+    import parseUsfm
+    expected = tokenSummary(parseUsfm.parseString(str))
+    assert tokenSummary(parseUsfm.iterTokens(str)) == expected
+    assert tokenSummary(parseUsfm.iterTokens(io.StringIO(str, newline=''))) == expected
+
+def test_chapterPieces():
+    import parseUsfm
+    pieces = list(parseUsfm.chapterPieces(sample))
+    assert len(pieces) == 3
+    assert ''.join(pieces) == sample
+    assert pieces[1].startswith('\\c 1\n') and pieces[2].startswith('\\c 2\n')
+
+# Tokens have no __dict__, and tokens of the same class have the same kind code.
+def test_token_kinds():
+    import parseUsfm
+    tokens = parseUsfm.parseString(sample)
+    for token in tokens:
+        assert not hasattr(token, '__dict__')
+        assert token.kind == parseUsfm.kinds[token.type]
+    assert parseUsfm.kinds['is'] == parseUsfm.kinds['is1'] != parseUsfm.kinds['is2']
+    assert len(set(parseUsfm.kinds.values())) == len(set(parseUsfm.options.values()))
+
+@pytest.mark.parametrize('str',
+    [
+        sample,
+        '\\p text\\',
+        '\\\\ a \\toc x\n\\zz\r\n\\f + \\fq* x',
+        '\\c 1\n\\v 1 a\n\\c 2\n\\v 1 b',
+        '',
+    ])
+def test_offset_tokens(str):
+    import io
+    import parseUsfm
+    expected = tokenSummary(parseUsfm.parseString(str))
+    assert tokenSummary(parseUsfm.parseString(str, offsets=True)) == expected
+    assert tokenSummary(parseUsfm.iterTokens(io.StringIO(str, newline=''), offsets=True)) == expected
+
+def test_offset_positions():
+    import parseUsfm
+    lines = sample.split('\n')
+    for tokens in (parseUsfm.parseString(sample, offsets=True), list(parseUsfm.iterTokens(sample, offsets=True))):
+        for token in tokens:
+            line, column = token.position()
+            if token.type in {'c', 'v', 'p', 'f', 'f*', 'text'}:
+                text = lines[line-1].expandtabs()
+                assert text[column-1:].startswith('\\' + token.type if token.type != 'text' else token.value)
+        v3 = [token for token in tokens if token.type == 'v' and token.value == '3-4'][0]
+        assert v3.position() == (16, 1)
+        assert isinstance(v3, parseUsfm.VToken) and v3.kind == parseUsfm.kinds['v']
+        assert not any('value' in getattr(c, '__slots__', ()) for c in type(v3).__mro__)
+
+def test_parse_cache(tmp_path, monkeypatch):
+    import parseUsfm
+    expected = tokenSummary(parseUsfm.parseString(sample))
+    expectedOffsets = tokenSummary(parseUsfm.parseString(sample, offsets=True))
+    monkeypatch.setattr(parseUsfm, 'cache_dir', None)
+    parseUsfm.setCache(str(tmp_path))
+    try:
+        assert tokenSummary(parseUsfm.parseString(sample)) == expected
+        assert tokenSummary(parseUsfm.iterTokens(sample)) == expected
+        assert tokenSummary(parseUsfm.parseString(sample, offsets=True)) == expectedOffsets
+        assert len(list(tmp_path.glob('*.tok'))) == 1 + 3 + 1     # whole text, chapters, and spans
+        # a warm parse reads the cache and does not tokenize
+        monkeypatch.setattr(parseUsfm, 'scanSpans', None)
+        assert tokenSummary(parseUsfm.parseString(sample)) == expected
+        assert tokenSummary(parseUsfm.iterTokens(sample)) == expected
+        assert tokenSummary(parseUsfm.parseString(sample, offsets=True)) == expectedOffsets
+    finally:
+        parseUsfm.setCache(None)
+
+# A cached parse by one engine is not returned for the other.
+def test_parse_cache_engines(tmp_path, monkeypatch):
+    import parseUsfm
+    monkeypatch.setattr(parseUsfm, 'cache_dir', None)
+    parseUsfm.setCache(str(tmp_path))
+    try:
+        parseUsfm.parseString(sample, engine='fast')
+        used = []
+        tokenize = parseUsfm.tokenize
+        monkeypatch.setattr(parseUsfm, 'tokenize', lambda s, engine=None: used.append(engine) or tokenize(s, engine))
+        parseUsfm.parseString(sample, engine='pyparsing')
+        parseUsfm.parseString(sample)
+        assert used == ['pyparsing']
+    finally:
+        parseUsfm.setCache(None)
+
+def test_parse_cache_eviction(tmp_path):
+    import parseUsfm
+    parseUsfm.setCache(str(tmp_path), maxsize=3000)
+    try:
+        for i in range(20):
+            parseUsfm.parseString(f"\\c 1\n\\v {i} " + "text " * 100)
+        entries = list(tmp_path.glob('*.tok'))
+        assert sum(entry.stat().st_size for entry in entries) <= 3000
+        assert 1 < len(entries) < 20
+    finally:
+        parseUsfm.setCache(None)
+
+def test_parseIncremental():
+    import parseUsfm
+    tokens, chapters = parseUsfm.parseIncremental(sample)
+    assert tokenSummary(tokens) == tokenSummary(parseUsfm.parseString(sample))
+    assert len(chapters) == 3
+
+    edited = sample.replace('theirs is the kingdom', 'theirs is the kingdom of heaven')
+    newtokens, newchapters = parseUsfm.parseIncremental(edited, chapters)
+    assert tokenSummary(newtokens) == tokenSummary(parseUsfm.parseString(edited))
+    assert newchapters[0][1] is chapters[0][1] and newchapters[2][1] is chapters[2][1]    # reused
+    assert newchapters[1][1] is not chapters[1][1]
+
+    # splitting a chapter in two
+    edited = sample.replace('\\v 3-4', '\\c 3\n\\v 3-4')
+    newtokens, newchapters = parseUsfm.parseIncremental(edited, chapters)
+    assert tokenSummary(newtokens) == tokenSummary(parseUsfm.parseString(edited))
+    assert len(newchapters) == 4
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_parseParallel(workers):
+    import parseUsfm
+    str = sample + sample.replace('\\id', '\\rem')
+    assert tokenSummary(parseUsfm.parseParallel(str, workers)) == tokenSummary(parseUsfm.parseString(str))
+    assert parseUsfm.parseParallel('', workers) == []
+
+def test_recovering_parse():
+    import parseUsfm
+    diagnostics = []
+    spans = parseUsfm.recoveringSpans('\\p a \\\n\\v 1 b \\ x\\', diagnostics, 5)
+    assert [span[0] for span in spans] == ['p', 'text', 'v', 'text', 'text']
+    assert [(d.offset, d.line, d.column) for d in diagnostics] == [(5, 5, 6), (14, 6, 8), (17, 6, 11)]
+
+    # clean() escapes every stray backslash, so cleaned text parses without errors
+    for str in (sample, '\\p a \\\n\\v 1 b \\ x\\'):
+        diagnostics = []
+        expected = tokenSummary(parseUsfm.parseString(str))
+        assert tokenSummary(parseUsfm.parseString(str, diagnostics=diagnostics)) == expected
+        assert tokenSummary(parseUsfm.iterTokens(str, diagnostics=diagnostics)) == expected
+        assert tokenSummary(parseUsfm.parseString(str, offsets=True, diagnostics=diagnostics)) == expected
+        assert diagnostics == []
+
+@pytest.mark.parametrize('str, result',
+    [
+        ('', ''),
+        ('a\xa0b', 'a b'),
+        ('\ufeff\\id MAT\ufeff', '\\id MAT\ufeff'),
+        ('\\p\r\n\\v 1 a\r\nb\r', '\\p\n\\v 1 a\nb\r'),
+        ('\\\\', '\\\\ \\\\ '),
+        ('\\\\\\x', '\\\\ \\\\ \\x'),
+        ('a \\ b\\\tc\\\nd\\\re\\\xa0', 'a \\\\ b\\\\\tc\\\\\nd\\\\\re\\\\ '),
+        ('end\\', 'end\\\\'),
+        ('\\\\\\', '\\\\ \\\\ \\\\'),
+    ])
+def test_clean(str, result):
+    import parseUsfm
+    assert parseUsfm.clean(str) == result
+
+def test_clean_nul():
+    import parseUsfm
+    diagnostics = []
+    assert parseUsfm.clean('\\p\n\\v 1 a\x00b\x00\n', diagnostics, 10) == '\\p\n\\v 1 a\x00b\x00\n'
+    assert [(d.kind, d.line, d.column, d.message) for d in diagnostics] == [('nul', 11, 7, '2 null character(s)')]
+    diagnostics = []
+    parseUsfm.parseString('\\c 1\n\\v 1 a\n\\c 2\n\\v 1 \x00', diagnostics=diagnostics)
+    assert [(d.kind, d.line) for d in diagnostics] == [('nul', 4)]
+    diagnostics = []
+    list(parseUsfm.iterTokens('\\c 1\n\\v 1 a\n\\c 2\n\\v 1 \x00', diagnostics=diagnostics))
+    assert [(d.kind, d.line) for d in diagnostics] == [('nul', 4)]
+
+@pytest.mark.parametrize('str',
+    [
+        sample,
+        '\\\\ a \\toc x\n\\zz\r\n\\f + \\fq* x א\U0001d11e',
+        '',
+    ])
+def test_usfmtok(str, tmp_path):
+    import parseUsfm
+    tokens = parseUsfm.parseString(str)
+    data = parseUsfm.dumpTokens(tokens)
+    assert data.startswith(parseUsfm.tokfile_magic)
+    assert tokenSummary(parseUsfm.loadTokens(data)) == tokenSummary(tokens)
+    assert tokenSummary(parseUsfm.loadTokens(parseUsfm.dumpTokens(parseUsfm.parseString(str, offsets=True)))) == tokenSummary(tokens)
+    path = os.path.join(tmp_path, "book.usfmtok")
+    parseUsfm.writeTokenFile(tokens, path)
+    assert tokenSummary(parseUsfm.readTokenFile(path)) == tokenSummary(tokens)
+
+def test_usfmtok_errors():
+    import parseUsfm
+    data = parseUsfm.dumpTokens(parseUsfm.parseString(sample))
+    for bad in (b'', b'USFMTOK', data[:-10], b'X' + data[1:]):
+        with pytest.raises(ValueError):
+            parseUsfm.loadTokens(bad)
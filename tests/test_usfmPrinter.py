@@ -0,0 +1,101 @@
+# pytest unit tests for usfmPrinter.py
+
+import os
+import sys
+
+tests_path = os.path.dirname(os.path.realpath(__file__))
+src_path = os.path.join(os.path.dirname(tests_path), "src")
+sys.path.append(src_path)
+import pytest
+
+sample = '\\id MAT unfoldingWord Literal Text\n\\ide UTF-8\n\\h Matthew\n\\toc1 The Gospel of Matthew\n\\mt Matthew\n\n\\s5\n\\c 1\n\\p\n\\v 1 The book of the genealogy of Jesus Christ, son of David.\n\\v 2 Abraham was the father of Isaac,\\f + \\ft Some versions add \\fqa text\\fqa* here.\\f* and Isaac the father of Jacob.\n\\q1 \\wj Blessed\\wj* are \\add the\\add* poor,\n\\v 3-4 Judah was the \\x - \\xo 1:3 \\xt Gen 38\\x* father.\n\\b\n\\cl Chapter 2\n\\r (Luke 2:1)\n\\v 1\tAfter Jesus was born\r\n'
+
+def tokenSummary(tokens):
+    return [(type(t).__name__, t.type, t.value) for t in tokens]
+
+# Parsing the printed tokens yields the same tokens.
+@pytest.mark.parametrize('str',
+    [
+        sample,
+        '\\p',                  # no white space after marker
+        '\\p\\v 1 x',
+        '\\c 1',                # no white space after chapter number
+        '\\c 1\\p',
+        '\\v\u3000 1',
+        '\\v\r12\\q',           # lone carriage return in an unknown marker
+        'abc\r\n\\p',
+        'abc\r\r\n\\p',
+        '\\s Title\r\r\nText',
+        '\\v - x',
+        '\\f*x',
+        '\\f**',
+        '\\wj*.',
+        '\\zz\r\n',
+        '\\zz x',
+        '\\s\n\\v 1 x',
+        'a\\\\b \\ c\\',        # escaped backslashes
+        '\\p\\\\',
+        '\\f +abc\\f*',
+        '\\ft \\fq x',
+        '\\q1\x0c1\\+xt*12x y',
+        '\\x*\\p',
+        '\ufeff\ufeffabc \\v 1 x',  # the first byte order mark is dropped, the second is text
+    ])
+def test_roundtrip(str):
+    import parseUsfm
+    import usfmPrinter
+    tokens = parseUsfm.parseString(str, engine='fast')
+    printed = usfmPrinter.printTokens(tokens)
+    assert tokenSummary(parseUsfm.parseString(printed, engine='fast')) == tokenSummary(tokens)
+
+@pytest.mark.parametrize('str, expected',
+    [
+        ('\\c 1 \\p \\v 1 In the beginning', '\\c 1\n\\p\n\\v 1 In the beginning\n'),
+        ('\\v 1 a\\f + \\fr 1:1 \\ft note\\f* b.', '\\v 1 a\\f + \\fr 1:1 \\ft note\\f* b.\n'),
+        ('\\v 1 \\wj Blessed\\wj*, are', '\\v 1 \\wj Blessed\\wj*, are\n'),
+        ('\\s Heading\n\\p ', '\\s Heading\n\\p\n'),
+        ('\\s Heading\n\\p', '\\s Heading\n\\p'),    # unknown marker, which white space would make known
+        ('\\c 1', '\\c 1'),
+        ('', ''),
+    ])
+def test_print(str, expected):
+    import parseUsfm
+    import usfmPrinter
+    assert usfmPrinter.printTokens(parseUsfm.parseString(str)) == expected
+
+def test_setInlineTags():
+    import parseUsfm
+    import usfmPrinter
+    printer = usfmPrinter.usfmPrinter()
+    printer.setInlineTags({'v'})
+    printer.printTokens(parseUsfm.parseString('\\p \\v 1 a \\v 2 b'))
+    assert printer.getvalue() == '\\p \\v 1 a \\v 2 b\n'
+
+# Empty text tokens are not printed.
+def test_empty_text():
+    import parseUsfm
+    import usfmPrinter
+    tokens = parseUsfm.parseString('\\f*x \\v 1 y')
+    for token in tokens:
+        if token.type == 'text':
+            token.value = ''
+    assert usfmPrinter.printTokens(tokens) == '\\f*\n\\v 1\n'
+
+# Tokens are not changed by printing them.
+def test_escaped_unchanged():
+    import parseUsfm
+    import usfmPrinter
+    tokens = parseUsfm.parseString('a \\ b')
+    before = tokenSummary(tokens)
+    usfmPrinter.printTokens(tokens)
+    assert tokenSummary(tokens) == before
+
+# The printer has a method for every render call made by the token classes.
+def test_render_protocol():
+    import parseUsfm
+    import usfmPrinter
+    printer = usfmPrinter.usfmPrinter()
+    for uclass in set(parseUsfm.options.values()):
+        token = uclass('1') if uclass is not parseUsfm.TEXTToken else uclass('x')
+        token.type = next(key for key, value in parseUsfm.options.items() if value is uclass)
+        token.renderOn(printer)
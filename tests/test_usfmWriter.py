@@ -0,0 +1,59 @@
+# pytest unit tests for usfmWriter.py
+
+import os
+import sys
+
+tests_path = os.path.dirname(os.path.realpath(__file__))
+src_path = os.path.join(os.path.dirname(tests_path), "src")
+sys.path.append(src_path)
+import io
+import pytest
+
+def writeSample(writer):
+    writer.writeUsfm("c", "1")
+    writer.writeUsfm("p")
+    writer.writeUsfm("v", "1")
+    writer.writeStr("In the beginning")
+    writer.writeUsfm("f", "+")
+    writer.writeUsfm("ft", "note")
+    writer.writeUsfm("f*")
+    writer.writeStr(".")
+
+sample = "\\c 1\n\\p\n\\v 1 In the beginning \\f + \\ft note \\f*.\n"
+
+@pytest.mark.parametrize('sink', [None, [], io.StringIO()])
+def test_memory(sink):
+    import usfmWriter
+    writer = usfmWriter.usfmWriter(sink=sink)
+    writeSample(writer)
+    assert writer.close() == False
+    assert writer.getvalue() == sample
+
+def test_file(tmp_path):
+    import usfmWriter
+    path = str(tmp_path / "a.usfm")
+    writer = usfmWriter.usfmWriter(path)
+    writeSample(writer)
+    assert writer.close() == True
+    with open(path, encoding='utf-8', newline='') as input:
+        assert input.read() == sample
+    with pytest.raises(ValueError):
+        writer.getvalue()
+
+# An atomic writer replaces the file only if the content changes.
+def test_atomic(tmp_path):
+    import usfmWriter
+    path = str(tmp_path / "a.usfm")
+    for expected in (True, False):
+        writer = usfmWriter.usfmWriter(path, atomic=True)
+        writeSample(writer)
+        assert not os.path.exists(path) or expected == False
+        assert writer.close() == expected
+    with open(path, encoding='utf-8', newline='') as input:
+        assert input.read() == sample
+    writer = usfmWriter.usfmWriter(path, atomic=True)
+    writer.writeUsfm("c", "2")
+    assert writer.close() == True
+    with open(path, encoding='utf-8', newline='') as input:
+        assert input.read() == "\\c 2\n"
+    assert os.listdir(tmp_path) == ["a.usfm"]
@@ -196,3 +196,12 @@ def test_mark_sections(line, expected):
     (c,s) = usfm_cleanup.mark_sections(line)
     assert s == expected
     assert c == expectchange
+
+# A stray null character does not stop the file from being cleaned, and is left in place.
+def test_convert_by_token_nul(tmp_path, monkeypatch):
+    import usfm_cleanup
+    path = tmp_path / "01-GEN.usfm"
+    path.write_text("\\id GEN\n\\c 1\n\\p\n\\v 1 in the beginning\x00 God created.\n", encoding="utf-8")
+    monkeypatch.setattr(usfm_cleanup, "config", {'source_dir': str(tmp_path)})
+    assert usfm_cleanup.convert_by_token(str(path))
+    assert path.read_text(encoding="utf-8") == "\\id GEN\n\\c 1\n\\p\n\\v 1 In the beginning\x00 God created.\n"
@@ -23,3 +23,328 @@ import pytest
 def test_nChapters(str, result):
     import verifyUSFM
     assert verifyUSFM.nChapters(str) == result
+
+def runVerify(folder, workers, monkeypatch, cache=False, jsonl=False, profile=''):
+    import configparser
+    import configmanager
+    import verifyUSFM
+    parser = configparser.ConfigParser()
+    parser['VerifyUSFM'] = {'source_dir': str(folder), 'filename': '', 'compare_dir': '',
+                            'standard_chapter_title': '', 'workers': str(workers), 'cache': str(cache),
+                            'issues_jsonl': str(jsonl), 'profile': profile}
+    class FakeConfigManager:
+        def get_section(self, name):
+            return parser[name]
+    monkeypatch.setattr(configmanager, "ToolsConfigManager", FakeConfigManager)
+    verifyUSFM.main()
+    return [(folder / name).read_text(encoding='utf-8').split('\n', 1)[1] for name in ("issues.txt", "wordlist.txt")]
+
+books = {'41-MAT.usfm': '\\id MAT\n\\usfm 3.0\n\\h Matthew\n\\mt Matthew\n\\c 1\n\\p\n\\v 1 Jesus Christ went to Galilee, \\zz and taught.\n\\v 3 Mixed CaSe word.\n',
+         '42-MRK.usfm': '\\id MRK\n\\h Mark\n\\toc3 Mrk\n\\mt Mark\n\\c 1\n\\p\n\\v 1 The beginning of the gospel \\zz of Jesus Christ.\n\\v 2 As it is written,\n',
+         'sub/43-LUK.usfm': '\\id LUK\n\\usfm 2\n\\h Luke\n\\mt Luke\n\\c 1\n\\p\n\\v 1 Many have undertaken \\zz to set down an account of Jesus.\n\\v 2 Just as they\n'}
+
+# Verifying files in parallel gives the same issues.txt and wordlist.txt as verifying them one at a time.
+def test_verifyDir_parallel(tmp_path, monkeypatch):
+    results = []
+    for workers in (1, 2):
+        folder = tmp_path / str(workers)
+        (folder / "sub").mkdir(parents=True)
+        for name, text in books.items():
+            (folder / name).write_text(text, encoding='utf-8')
+        results.append(runVerify(folder, workers, monkeypatch))
+    assert "Invalid USFM token" in results[0][0]
+    assert results[0] == results[1]
+
+# Results kept in the cache give the same output, and a changed file is verified again.
+def test_verifyDir_cache(tmp_path, monkeypatch):
+    import verifyUSFM
+    for name, text in books.items():
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).write_text(text, encoding='utf-8')
+    first = runVerify(tmp_path, 1, monkeypatch, cache=True)
+    assert len(os.listdir(tmp_path / ".verifyUSFM-cache")) == len(books)
+    monkeypatch.setattr(verifyUSFM, "verifyWorker", None)     # results must come from the cache
+    assert runVerify(tmp_path, 1, monkeypatch, cache=True) == first
+    monkeypatch.undo()
+    (tmp_path / '42-MRK.usfm').write_text(books['42-MRK.usfm'].replace("gospel", "good news"), encoding='utf-8')
+    changed = runVerify(tmp_path, 1, monkeypatch, cache=True)
+    assert "gospel" not in changed[1] and "news" in changed[1]
+    assert len(os.listdir(tmp_path / ".verifyUSFM-cache")) == len(books)
+
+# issues.jsonl has a record for each issue, with the reference where it was found, in the order of issues.txt.
+@pytest.mark.parametrize('workers', [1, 2])
+def test_verifyDir_jsonl(tmp_path, monkeypatch, workers):
+    import json
+    for name, text in books.items():
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).write_text(text, encoding='utf-8')
+    issues = runVerify(tmp_path, workers, monkeypatch, jsonl=True)[0]
+    records = [json.loads(line) for line in (tmp_path / "issues.jsonl").read_text(encoding='utf-8').splitlines()]
+    assert [r['message'] for r in records if not r['summarized']] == issues.split("\n\nSUMMARY:")[0].split("\n")[1:]
+    assert {'id': 67, 'reference': 'MRK 1:1', 'message': 'Invalid USFM token (\\zz) near MRK 1:1', 'summarized': False} in records
+
+# Profiling prints a table of the timings, writes a profile of each file, and leaves the results unchanged.
+def test_verifyDir_profile(tmp_path, monkeypatch, capsys):
+    import json
+    import verifyUSFM
+    for name, text in books.items():
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).write_text(text, encoding='utf-8')
+    plain = runVerify(tmp_path, 1, monkeypatch)
+    capsys.readouterr()
+    take = verifyUSFM.take
+    assert runVerify(tmp_path, 2, monkeypatch, profile='json') == plain
+    table = capsys.readouterr().out.split("\nProfile")[1]
+    assert "take " in table and "takeV " in table and "parse " in table and "addWords " in table
+    assert verifyUSFM.take is take and verifyUSFM.timings is None
+    profile = json.loads((tmp_path / ".verifyUSFM-profile" / "sub_43-LUK.usfm.json").read_text(encoding='utf-8'))
+    assert profile['readUsfm']['calls'] == 1 and profile['take']['seconds'] > 0
+
+# A profiled run that fails puts the profiled functions back.
+def test_verifyDir_profile_error(tmp_path, monkeypatch):
+    import verifyUSFM
+    for name, text in books.items():
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).write_text(text, encoding='utf-8')
+    take = verifyUSFM.take
+    flush = verifyUSFM.IssueSink.flush
+    readUsfm = verifyUSFM.readUsfm
+    def failingRead(path):
+        if str(path).endswith('43-LUK.usfm'):
+            raise OSError(f"cannot read {path}")
+        return readUsfm(path)
+    monkeypatch.setattr(verifyUSFM, "readUsfm", failingRead)
+    with pytest.raises(OSError):
+        runVerify(tmp_path, 1, monkeypatch, profile='json')
+    assert verifyUSFM.take is take and verifyUSFM.IssueSink.flush is flush
+    assert verifyUSFM.readUsfm is failingRead and verifyUSFM.timings is None
+
+# A run that fails still writes the issues reported before it failed, and closes its files.
+def test_verifyDir_error(tmp_path, monkeypatch):
+    import json
+    import verifyUSFM
+    for name, text in books.items():
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).write_text(text, encoding='utf-8')
+    readUsfm = verifyUSFM.readUsfm
+    read = []
+    def failingRead(path):
+        if len(read) == 2:
+            raise OSError(f"cannot read {path}")
+        read.append(path.name[3:6])
+        return readUsfm(path)
+    monkeypatch.setattr(verifyUSFM, "readUsfm", failingRead)
+    with pytest.raises(OSError):
+        runVerify(tmp_path, 1, monkeypatch, jsonl=True)
+    assert verifyUSFM.sink is None and verifyUSFM.issuesFile is None
+    issues = (tmp_path / "issues.txt").read_text(encoding='utf-8')
+    for id in read:
+        assert f"Invalid USFM token (\\zz) near {id} 1:1" in issues
+    records = [json.loads(line) for line in (tmp_path / "issues.jsonl").read_text(encoding='utf-8').splitlines()]
+    assert [r['message'] for r in records if not r['summarized']] == issues.split("\n", 2)[2].splitlines()
+
+sampleBook = '\\id MRK\n\\usfm 3.0\n\\h Mark\n\\toc3 Mrk\n\\mt Mark\n\\c 1\n\\p\n\\v 1 The beginning of the gospel \\zz of Jesus Christ.\n\\v 3 As it is written,\n'
+
+def test_Verifier():
+    import verifyUSFM
+    before = (verifyUSFM.state, verifyUSFM.issues, verifyUSFM.usfm_version)
+    verifier = verifyUSFM.Verifier()
+    issues = verifier.verify_text(sampleBook, "41-MRK.usfm")
+    assert (verifyUSFM.state, verifyUSFM.issues, verifyUSFM.usfm_version) == before
+    messages = [str(issue) for issue in issues]
+    assert "Missing verse between: MRK 1:1 and MRK 1:3" in messages
+    assert not any("Invalid USFM token" in message for message in messages)     # \usfm 3.0
+    assert verifier.usfm_version == 3
+    assert sum(count for msg, count, suffix in verifier.issues.values()) == sum(1 for issue in issues if issue.errorId > 0)
+    assert verifier.wordlist["gospel"] == (1, "MRK 1:1")
+
+# Verifiers keep their own state, and can be used from several threads.
+def test_Verifier_threads():
+    import threading
+    import verifyUSFM
+    expected = [str(issue) for issue in verifyUSFM.Verifier().verify_text(sampleBook, "41-MRK.usfm")]
+    results = []
+    def verify():
+        verifier = verifyUSFM.Verifier()
+        results.append([str(issue) for issue in verifier.verify_text(sampleBook, "41-MRK.usfm")])
+    threads = [threading.Thread(target=verify) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [expected] * 4
+
+# A listener can use a Verifier while main() runs, and neither changes the results of the other.
+def test_Verifier_listener(tmp_path, monkeypatch):
+    import verifyUSFM
+    expected = [str(issue) for issue in verifyUSFM.Verifier(suppress=[True]*12).verify_text(sampleBook, "41-MRK.usfm")]
+    for name, text in books.items():
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).write_text(text.replace("\\v 2 ", "\\v 2 Later ,they said "), encoding='utf-8')
+    alone = runVerify(tmp_path, 1, monkeypatch)
+    assert "Space before phrase ending mark" in alone[0]
+    results = []
+    class Listener:
+        def error(self, msg, errorId):
+            verifier = verifyUSFM.Verifier(suppress=[True]*12)
+            results.append([str(issue) for issue in verifier.verify_text(sampleBook, "41-MRK.usfm")])
+        def progress(self, msg):
+            pass
+    monkeypatch.setattr(verifyUSFM, "listener", Listener())
+    assert runVerify(tmp_path, 1, monkeypatch) == alone
+    assert results and all(result == expected for result in results)
+
+# main() and Verifiers in other threads take turns.
+def test_Verifier_main_threads(tmp_path, monkeypatch):
+    import threading
+    import verifyUSFM
+    book = sampleBook + ''.join(f"\\v {v} Some text ,with issues{v} in it\n" for v in range(4, 200))
+    expected = [str(issue) for issue in verifyUSFM.Verifier().verify_text(book, "41-MRK.usfm")]
+    for name, text in books.items():
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).write_text(text + ''.join(f"\\v {v} More text ,here\n" for v in range(3, 200)), encoding='utf-8')
+    alone = runVerify(tmp_path, 1, monkeypatch)
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        results = []
+        def verify():
+            for i in range(5):
+                results.append([str(issue) for issue in verifyUSFM.Verifier().verify_text(book, "41-MRK.usfm")])
+        threads = [threading.Thread(target=verify) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        outputs = [runVerify(tmp_path, 1, monkeypatch) for i in range(3)]
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert outputs == [alone] * 3
+    assert results == [expected] * 10
+
+# Stands in for the set of characters in a piece of text, but makes every check search the text.
+class Unfiltered:
+    def __init__(self, text):
+        self.text = text
+    def isdisjoint(self, other):
+        return False
+    def __contains__(self, c):
+        return c in self.text
+    def __iter__(self):
+        return iter('0')
+
+# The checks report the same issues when they skip the searches that cannot match.
+@pytest.mark.parametrize('text',
+    [
+        'In the beginning God created the heavens and the earth.',
+        'He said,“Come.”. Then he went.',
+        'a ( b ” c',
+        '“ begins with a quote',
+        'ends with a quote ”',
+        "It''s a \"\"word\"\" with/slash = and \\ backslash",
+        'mid.word and x(y)z',
+        'Verse 2 and 3 go here, see 3:16 and 12-15.',
+        'Number٣٤ in Arabic-Indic digits, and 12345 unsegmented, 1 000 spaced, 007 leading.',
+        '2 starts with the verse number',
+        'chapter 1,5 and 2.5 and word5suffix and 5th',
+    ])
+def test_reportPunctuation_filtered(text, monkeypatch):
+    import verifyUSFM
+    results = []
+    for textchars in (Unfiltered(text), set(text)):
+        monkeypatch.setattr(verifyUSFM, "state", verifyUSFM.State())
+        verifyUSFM.state.addChapter("1")
+        verifyUSFM.state.addVerse("2")
+        monkeypatch.setattr(verifyUSFM, "recorder", [])
+        verifyUSFM.reportPunctuation(text, textchars)
+        verifyUSFM.reportNumbers(text, False, textchars)
+        results.append(verifyUSFM.recorder)
+    assert results[0] == results[1]
+
+# The source text index is saved in the compare_dir, reused by another project, and rebuilt when the source changes.
+def test_sourceIndex(tmp_path, monkeypatch):
+    import verifyUSFM
+    source = sampleBook.replace(" \\zz", "").replace("As it is written,", "And so it was written in the prophets,")
+    (tmp_path / "41-MRK.usfm").write_text(source, encoding='utf-8')
+    untranslated = "Verse may be untranslated (based on words in common): MRK 1:1"
+    issues = verifyUSFM.Verifier(compare_dir=str(tmp_path)).verify_text(sampleBook, "41-MRK.usfm")
+    assert [str(issue) for issue in issues if "untranslated" in str(issue)] == [untranslated]
+    assert os.listdir(tmp_path / ".verifyUSFM-index") == ["41-MRK.usfm.pickle"]
+
+    monkeypatch.setattr(verifyUSFM, "source_indexes", dict())
+    monkeypatch.setattr(verifyUSFM, "indexSource", None)     # the index must come from the saved file
+    issues = verifyUSFM.Verifier(compare_dir=str(tmp_path)).verify_text(sampleBook, "41-MRK.usfm")
+    assert [str(issue) for issue in issues if "untranslated" in str(issue)] == [untranslated]
+    monkeypatch.undo()
+
+    (tmp_path / "41-MRK.usfm").write_text(source.replace("\\v 1 The", "\\v 3 The"), encoding='utf-8')
+    issues = verifyUSFM.Verifier(compare_dir=str(tmp_path)).verify_text(sampleBook, "41-MRK.usfm")
+    assert not [issue for issue in issues if "untranslated" in str(issue)]
+
+@pytest.mark.parametrize('source, target, result',
+    [
+        ('the way of the lord', 'the way of the lord', (0.75, 3)),
+        ('the way of the lord', 'The Way of peace', (0.0, 0)),
+        ('the way of the lord', 'the road of the lord', (0.4, 2)),
+        ('', '', (0, 0)),
+    ])
+def test_similarities(source, target, result):
+    import verifyUSFM
+    index = verifyUSFM.indexSource(f"\\id MRK\n\\c 1\n\\p\n\\v 1 {source}\n")
+    assert verifyUSFM.similarities(index, {"MRK 1:1": target, "MRK 1:2": target}) == ({"MRK 1:1": result} if source else {})
+
+# The similarities of a whole book agree with the verses reported as untranslated.
+def test_Verifier_similarities(tmp_path):
+    import verifyUSFM
+    source = sampleBook.replace(" \\zz", "").replace("As it is written,", "And so it was written in the prophets,")
+    (tmp_path / "41-MRK.usfm").write_text(source, encoding='utf-8')
+    verifier = verifyUSFM.Verifier(compare_dir=str(tmp_path))
+    scores = verifier.similarities(sampleBook, "41-MRK.usfm")
+    assert sorted(scores) == ["MRK 1:1", "MRK 1:3"]
+    assert [ref for ref, (sim, n) in scores.items() if sim > verifyUSFM.untranslated_similarity] == ["MRK 1:1"]
+    assert verifyUSFM.Verifier().similarities(sampleBook, "41-MRK.usfm") == {}
+
+# Checks that are turned off are left out of the text checks. Checks that are reduced to totals stay in.
+@pytest.mark.parametrize('flags, aligned, result',
+    [
+        ([], False, ['checkPunctuation', 'checkLeadingPunctuation', 'checkFootnotes', 'checkNumbers', 'checkCaps']),
+        ([1, 3], False, ['checkLeadingPunctuation', 'checkFootnotes', 'checkCaps']),
+        ([10], False, ['checkPunctuation', 'checkLeadingPunctuation', 'checkFootnotes', 'checkNumbers', 'checkCaps']),
+        ([], True, ['checkLeadingPunctuation', 'checkNumbers', 'checkCaps']),
+    ])
+def test_textChecks(flags, aligned, result, monkeypatch):
+    import verifyUSFM
+    suppress = [False]*12
+    for flag in flags:
+        suppress[flag] = True
+    monkeypatch.setattr(verifyUSFM, "suppress", suppress)
+    monkeypatch.setattr(verifyUSFM, "aligned_usfm", aligned)
+    assert [check.__name__ for check in verifyUSFM.textChecks()] == result
+    assert verifyUSFM.checkMode(10) == (verifyUSFM.TOTALS if 10 in flags else verifyUSFM.REPORT)
+
+# Every suppress flag has a mode, and the text checks start out as those for the default settings.
+def test_suppress_modes():
+    import verifyUSFM
+    assert sorted(verifyUSFM.suppress_modes) == list(range(1, len(verifyUSFM.suppress)))
+    import subprocess
+    names = subprocess.run([sys.executable, '-c', 'import verifyUSFM; print(*[c.__name__ for c in verifyUSFM.text_checks])'],
+                           cwd=src_path, capture_output=True, text=True, check=True).stdout.split()
+    assert names == ['checkPunctuation', 'checkLeadingPunctuation', 'checkFootnotes', 'checkNumbers', 'checkCaps']
+
+# scanStructure() finds what each of its patterns would find by itself, including where the matches overlap.
+@pytest.mark.parametrize('text',
+    [
+        '\\id GEN\n\\c 1\n\\p\n\\v 1 In the beginning.\n\\v 2 And the earth.\n',
+        '\\c1\n\\v1 text\\v 2text \\c 2 x\n\\v 3-4a more\\v\u0663 \\va 5\\va\n\\cl Chapter\n\\c 3 x\n',
+        'x\\c 1\\c 2\\c 3\n\\v 1\\v 2\\v3\\v 4-\n\\\\v 5 \\c\u0663 \n\\c 4',
+        "it's a b'c'd \"quoted\" word' 'x\n\n\n\n\nSECTION\n\n\\p\n\n\n",
+        'empty \\wj \\wj* and x\\wj  \\wj* \\wj \\wj \\wj*\\ \nend\\\n\\  \\wj\n',
+        '',
+    ])
+def test_scanStructure(text):
+    import verifyUSFM
+    structure = verifyUSFM.scanStructure(text)
+    for patterns in verifyUSFM.scan_patterns.values():
+        for pattern, offset in patterns:
+            assert [m.span() for m in structure[pattern]] == [m.span() for m in pattern.finditer(text)], pattern.pattern
+    assert (structure["'"], structure['"']) == (text.count("'"), text.count('"'))